@@ -0,0 +1,216 @@
+# ----------------------------------------------------------------------
+# Name:     batch_search
+# Purpose:  Solve many quests at once across a pool of processes
+# ----------------------------------------------------------------------
+"""
+Batch quest solver.
+
+The problems are grouped by maze and each group is cut into chunks of
+consecutive problems, enough chunks to keep every worker process busy
+even when the whole batch is on one maze.  Each worker keeps the tables
+it has precomputed for a maze (the distance_tables heuristic), so they
+are built at most once per worker and maze.  Results are streamed back
+as soon as each problem is solved, one JSON object per line.
+Usage:  batch_search.py problems [--algorithm A] [--heuristic H]
+                        [--workers N] [--timeout SECONDS]
+problems: a pickle file holding a list of Problem objects
+algorithm: bfs, ucs or astar (default astar)
+heuristic: the name of a heuristic function in informed_search, or
+           distance_tables (default null_heuristic)
+Examples:
+batch_search.py quests.pickle --heuristic better_heuristic
+batch_search.py quests.pickle --heuristic distance_tables --timeout 5
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import pickle
+import queue
+import time
+import math
+import informed_search
+import search_driver
+
+ALGORITHMS = ('bfs', 'ucs', 'astar')
+
+# distance tables built by this worker process, (maze, medals) -> tables
+_tables = {}
+
+
+def maze_key(problem, index):
+    """
+    Default grouping of the problems: problems with an equal maze
+    attribute share a worker, any other problem gets a group of its own.
+    :param problem: (a Problem object) representing the quest
+    :param index: (int) position of the problem in the batch
+    :return: a hashable key naming the problem's maze
+    """
+    maze = getattr(problem, 'maze', None)
+    if maze is None:
+        return ('problem', index)
+    return ('maze', repr(maze))
+
+
+def solve_batch(problems, algorithm='astar', heuristic='null_heuristic',
+                workers=None, timeout=None, key=maze_key):
+    """
+    Solve a sequence of problems in a pool of worker processes.
+    :param problems: a sequence (or iterable) of picklable Problem objects
+    :param algorithm: (string) 'bfs', 'ucs' or 'astar'
+    :param heuristic: (string) name of a heuristic function in
+        informed_search, or 'distance_tables'
+    :param workers: (int) optional, number of worker processes
+    :param timeout: (number) optional, seconds allowed per problem
+    :param key: (a function) f(problem, index) giving the maze of each
+        problem, problems on the same maze are solved in chunks that
+        share the worker's tables
+    :return: yields one dictionary per problem, in completion order, with
+        the problem's index, its status ('solved', 'unsolvable',
+        'timeout' or 'error'), the actions, the time taken and the
+        number of states expanded
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError('unknown algorithm: {}'.format(algorithm))
+    groups = collections.OrderedDict()
+    for index, problem in enumerate(problems):
+        groups.setdefault(key(problem, index), []).append((index, problem))
+    remaining = sum(len(group) for group in groups.values())
+    if workers is None:
+        workers = os.cpu_count() or 1
+    with multiprocessing.Manager() as manager, \
+            concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        results = manager.Queue()
+        futures = [pool.submit(_solve_group, group_key, chunk, algorithm,
+                               heuristic, timeout, results)
+                   for group_key, chunk in _chunks(groups, remaining,
+                                                   workers)]
+        while remaining:
+            try:
+                result = results.get(timeout=0.1)
+            except queue.Empty:
+                if all(future.done() for future in futures):
+                    for future in futures:
+                        future.result()  # raise what killed a worker
+                    if results.empty():
+                        break
+                continue
+            remaining -= 1
+            yield result
+
+
+def _chunks(groups, count, workers):
+    """
+    Cut the maze groups into chunks, small enough that every worker gets
+    some (a few chunks each, to even out slow and fast problems) but no
+    smaller, since each chunk may have to build its maze's tables again
+    on a worker that has not seen that maze yet.
+    :param groups: (OrderedDict) maze key -> list of (index, problem)
+    :param count: (int) total number of problems
+    :param workers: (int) number of worker processes
+    :return: yields (maze key, list of (index, problem)) tuples
+    """
+    size = max(1, math.ceil(count / (workers * 4)))
+    for group_key, group in groups.items():
+        for start in range(0, len(group), size):
+            yield group_key, group[start:start + size]
+
+
+def _solve_group(group_key, group, algorithm, heuristic, timeout, results):
+    """
+    Worker process: solve some problems of one maze one after the other.
+    :param group_key: the maze key shared by the problems
+    :param group: list of (index, problem) tuples
+    :param algorithm: (string) 'bfs', 'ucs' or 'astar'
+    :param heuristic: (string) name of the heuristic
+    :param timeout: (number) seconds allowed per problem, or None
+    :param results: (queue) receives one dictionary per problem
+    :return: None
+    """
+    for index, problem in group:
+        started = time.perf_counter()
+        result = {'index': index, 'actions': None, 'expanded': 0,
+                  'worker': os.getpid()}
+        try:
+            driver = search_driver.SearchDriver(
+                problem, algorithm,
+                _heuristic(heuristic, group_key, problem))
+            if timeout is None:
+                driver.step()
+            else:
+                left = timeout - (time.perf_counter() - started)
+                if left > 0:
+                    driver.step(max_microseconds=left * 1e6)
+                if not driver.done:
+                    driver.cancel()
+            result['expanded'] = driver.expanded
+            result['actions'] = driver.solution
+            if driver.cancelled:
+                result['status'] = 'timeout'
+            elif driver.solution is None:
+                result['status'] = 'unsolvable'
+            else:
+                result['status'] = 'solved'
+        except Exception as error:
+            result['status'] = 'error'
+            result['error'] = repr(error)
+        result['seconds'] = time.perf_counter() - started
+        results.put(result)
+
+
+def _heuristic(name, group_key, problem):
+    """
+    Find the heuristic function for a problem.
+    :param name: (string) name of the heuristic
+    :param group_key: the maze key of the problem
+    :param problem: (a Problem object) representing the quest
+    :return: the heuristic function
+    """
+    if name != 'distance_tables':
+        return getattr(informed_search, name)
+    import distance_tables  # needs numpy, only loaded when asked for
+    medals = tuple(sorted(problem.start_state()[1]))
+    if (group_key, medals) not in _tables:
+        _tables[(group_key, medals)] = distance_tables.build_tables(problem)
+    return _tables[(group_key, medals)]
+
+
+def get_arguments():
+    """
+    Parse and validate the command line arguments
+    :return: the parsed arguments
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('problems',
+                        help='pickle file holding a list of problems')
+    parser.add_argument('--algorithm',
+                        help='bfs, ucs or astar?',
+                        choices=ALGORITHMS,
+                        default='astar')
+    parser.add_argument('--heuristic',
+                        help='heuristic function name for astar',
+                        default='null_heuristic')
+    parser.add_argument('--workers',
+                        help='number of worker processes',
+                        type=int,
+                        default=None)
+    parser.add_argument('--timeout',
+                        help='seconds allowed per problem',
+                        type=float,
+                        default=None)
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    with open(arguments.problems, 'rb') as problem_file:
+        problems = pickle.load(problem_file)
+    for result in solve_batch(problems, arguments.algorithm,
+                              arguments.heuristic, arguments.workers,
+                              arguments.timeout):
+        print(json.dumps(result), flush=True)
+
+if __name__ == '__main__':
+    main()
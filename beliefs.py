@@ -3,6 +3,8 @@
 # Purpose:  Probabilistic inference with Bayes' Rule (Belief system)
 # ----------------------------------------------------------------------
 
+import numpy
+import likelihood_tables
 import utils
 
 
@@ -14,6 +16,7 @@ class Belief(object):
     """
 
     def __init__(self, size):
+        self.size = size
         # Initially all positions are open - have not been observed
         self.open = {(x, y) for x in range(size)
                      for y in range(size)}
@@ -32,9 +35,12 @@ class Belief(object):
                 :return: None
         """
         pro = []
+        # P(color | distance) for every distance, from the model's table
+        likelihood = likelihood_tables.get_table(model).probabilities(
+            color, 2 * (self.size - 1)).tolist()
         for square in self.current_distribution:
             prior_pro = self.current_distribution[square]
-            pro_sensor = model.psonargivendist(color, utils.manhattan_distance(sensor_position, square))
+            pro_sensor = likelihood[utils.manhattan_distance(sensor_position, square)]
             probability = (prior_pro * pro_sensor)
             pro.append(probability)
             self.current_distribution[square] = probability
@@ -83,3 +89,89 @@ class Belief(object):
         else:
 
             return max(observed_probability, key=lambda x: observed_probability[x])
+
+
+class ArrayBelief(object):
+    """
+    Belief distribution stored as a 2-D array, with the same update and
+    recommend_sensing methods as Belief.  The probability of position
+    (x, y) is current_distribution[x, y].  An update looks up the
+    likelihood of every possible distance once and applies it to the
+    whole board with a single multiply and normalize, so large boards
+    stay interactive.  The likelihoods come from the model's
+    LikelihoodTable and the distance grids of recent sensor positions
+    are cached, see likelihood_tables.py.
+
+    Arguments:
+    size (int): the number of rows/columns of the board
+    cache_size (int): the number of sensor positions whose distance
+        grids are kept
+
+    Attributes:
+    size (int): the number of rows/columns of the board
+    current_distribution (numpy array): size x size probabilities
+    unobserved (numpy array): size x size booleans, True for the
+        positions that have not been sensed yet
+    grids (DistanceGrids): the cached distance grids
+    """
+
+    def __init__(self, size, cache_size=32):
+        self.size = size
+        self.current_distribution = numpy.full((size, size), 1 / (size ** 2))
+        self.unobserved = numpy.ones((size, size), dtype=bool)
+        self.grids = likelihood_tables.DistanceGrids(size, cache_size)
+
+    @property
+    def open(self):
+        """
+        :return: the set of positions that have not been observed, as in
+            Belief
+        """
+        return set(zip(*(coordinates.tolist() for coordinates
+                         in numpy.nonzero(self.unobserved))))
+
+    def update(self, color, sensor_position, model):
+        """
+        Update the belief distribution based on new evidence:  agent
+        detected the given color at sensor location: sensor_position.
+        :param color: (string) color detected
+        :param sensor_position: (tuple) position of the sensor
+        :param model (Model object) models the relationship between the
+             treasure location and the sensor data
+        :return: None
+        """
+        distribution = self.current_distribution
+        likelihood = likelihood_tables.get_table(model).probabilities(
+            color, 2 * (self.size - 1))
+        distribution *= likelihood[self.grids.distances(sensor_position)]
+        total_probability = distribution.sum()
+        # normalization
+        if total_probability > 0:
+            distribution /= total_probability
+        self.unobserved[sensor_position] = False
+
+    def recommend_sensing(self):
+        """
+        Recommend where to sense next: the unobserved position with the
+        highest probability.  If every unobserved position has
+        probability 0, the unobserved position closest to the most likely
+        observed position.  Once every position has been observed, the
+        most likely position.
+        :return: (tuple) the recommended position
+        """
+        distribution = self.current_distribution
+        if not self.unobserved.any():
+            return self._position(distribution.argmax())
+        unobserved = numpy.where(self.unobserved, distribution, -1)
+        if unobserved.max() > 0:
+            return self._position(unobserved.argmax())
+        observed = numpy.where(self.unobserved, -1, distribution)
+        high_observed = self._position(observed.argmax())
+        return utils.closest_point(high_observed, self.open)
+
+    def _position(self, index):
+        """
+        :param index: (int) index into the flattened board
+        :return: (tuple) the corresponding (x, y) position
+        """
+        return divmod(int(index), self.size)
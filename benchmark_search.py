@@ -0,0 +1,283 @@
+# ----------------------------------------------------------------------
+# Name:     benchmark_search
+# Purpose:  Repeatable benchmark of the uninformed and informed searches
+#           on generated mazes, compared against a stored baseline
+# ----------------------------------------------------------------------
+"""
+Search benchmark.
+
+Every algorithm and heuristic pair is run on a fixed set of seeded
+quests.  Wall time (best of the repeats), expansions and peak memory are
+reported, and compared against a baseline file when one is given.
+Usage:  benchmark_search.py [--baseline FILE] [--save FILE]
+                            [--threshold FRACTION] [--repeat N]
+Examples:
+benchmark_search.py --save search_baseline.json
+benchmark_search.py --baseline search_baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+import informed_search
+import uninformed_search
+
+# the quests: name -> (seed, size, wall density, medals, cost map)
+UNIFORM = {'N': 1, 'S': 1, 'E': 1, 'W': 1}
+WEIGHTED = {'N': 4, 'S': 3, 'E': 5, 'W': 1}
+QUESTS = {
+    'open-30-1': (9, 30, 0.05, 1, UNIFORM),
+    'maze-40-2': (2, 40, 0.25, 2, UNIFORM),
+    'weighted-30-3': (3, 30, 0.20, 3, WEIGHTED),
+    'weighted-20-5': (4, 20, 0.15, 5, WEIGHTED),
+    'open-60-2': (5, 60, 0.10, 2, UNIFORM),
+    'sparse-40-4': (7, 40, 0.08, 4, UNIFORM),
+}
+
+# timing differences below this many seconds are treated as noise
+TIME_NOISE = 0.002
+
+_jump_tables = {}  # maze -> the JumpTable shared by its jps-table runs
+
+
+def _jps_table(problem, heuristic):
+    """
+    jps reusing one JumpTable per maze, as a batch of quests on the same
+    maze would: only the first run pays for scanning the maze.
+    :param problem: (GridQuest) the quest
+    :param heuristic: (a function) the heuristic function to be used
+    :return: list of actions representing the solution to the quest
+    """
+    maze = (problem.size, frozenset(problem.walls))
+    if maze not in _jump_tables:
+        _jump_tables[maze] = informed_search.JumpTable(problem)
+    return informed_search.jps(problem, heuristic, _jump_tables[maze])
+
+
+# the searches: name -> f(problem)
+SEARCHES = {
+    'bfs': uninformed_search.bfs,
+    'lean_bfs': uninformed_search.lean_bfs,
+    'ucs': uninformed_search.ucs,
+}
+for _name in ('null_heuristic', 'single_heuristic', 'better_heuristic',
+              'gen_heuristic', 'mst_heuristic'):
+    _heuristic = getattr(informed_search, _name)
+    SEARCHES['astar/' + _name] = (
+        lambda problem, heuristic=_heuristic:
+        informed_search.astar(problem, heuristic))
+    SEARCHES['jps-table/' + _name] = (
+        lambda problem, heuristic=_heuristic: _jps_table(problem, heuristic))
+
+
+class GridQuest(object):
+    """
+    Stand-in for the quest Problem: Sammy walks N/S/E/W on a grid with
+    walls and has to collect every medal.
+    A state is represented by a tuple containing:
+        the current position (row, column) of Sammy the Spartan
+        a tuple containing the positions of the remaining medals
+
+    Arguments:
+    size (int) number of rows/columns of the grid
+    walls (set) the positions of the walls
+    start (tuple) the start position
+    medals (tuple) the positions of the medals
+    cost (dictionary) direction -> cost of moving in that direction
+
+    Attributes:
+    size, walls, start, medals, cost as above
+    expansions (int) number of calls to expand so far
+    """
+
+    MOVES = {'N': (-1, 0), 'S': (1, 0), 'E': (0, 1), 'W': (0, -1)}
+
+    def __init__(self, size, walls, start, medals, cost):
+        self.size = size
+        self.walls = walls
+        self.start = start
+        self.medals = medals
+        self.cost = cost
+        self.expansions = 0
+
+    def start_state(self):
+        return self.start, self.medals
+
+    def is_goal(self, state):
+        return not state[1]
+
+    def expand(self, state):
+        """
+        :param state: the state to expand
+        :return: list of (child state, action, action cost) tuples
+        """
+        self.expansions += 1
+        (row, column), metals = state
+        children = []
+        for action, (row_step, column_step) in self.MOVES.items():
+            position = (row + row_step, column + column_step)
+            if (0 <= position[0] < self.size and
+                    0 <= position[1] < self.size and
+                    position not in self.walls):
+                remaining = tuple(m for m in metals if m != position)
+                children.append(((position, remaining), action,
+                                 self.cost[action]))
+        return children
+
+
+def generate_quest(seed, size, density, medals, cost):
+    """
+    Generate a random quest.  The start and the medals are picked among
+    the squares reachable from each other, so every quest has a solution.
+    :param seed: (int) seed of the random generator
+    :param size: (int) number of rows/columns of the grid
+    :param density: (float) probability that a square is a wall
+    :param medals: (int) number of medals
+    :param cost: (dictionary) direction -> cost of moving in that direction
+    :return: a GridQuest
+    """
+    generator = random.Random(seed)
+    squares = [(row, column) for row in range(size) for column in range(size)]
+    walls = {square for square in squares if generator.random() < density}
+    open_squares = [square for square in squares if square not in walls]
+    start = generator.choice(open_squares)
+    reachable = {start}
+    fringe = [start]
+    while fringe:
+        row, column = fringe.pop()
+        for row_step, column_step in GridQuest.MOVES.values():
+            position = (row + row_step, column + column_step)
+            if (position in reachable or position in walls or
+                    not (0 <= position[0] < size and 0 <= position[1] < size)):
+                continue
+            reachable.add(position)
+            fringe.append(position)
+    reachable.discard(start)
+    if len(reachable) < medals:
+        raise ValueError(
+            'seed {}: only {} squares reachable from the start {}, '
+            'cannot place {} medals; lower the wall density or pick '
+            'another seed'.format(seed, len(reachable), start, medals))
+    chosen = tuple(generator.sample(sorted(reachable), medals))
+    return GridQuest(size, walls, start, chosen, cost)
+
+
+def measure(search, quest_settings, repeat):
+    """
+    Run one search on one quest.
+    :param search: (a function) f(problem) returning the actions
+    :param quest_settings: (tuple) the arguments of generate_quest
+    :param repeat: (int) number of timed runs, the fastest is kept
+    :return: (dictionary) seconds, expansions, peak memory in bytes,
+        solution cost and solution length (None if unsolved)
+    """
+    seconds = []
+    for _ in range(repeat):
+        problem = generate_quest(*quest_settings)
+        started = time.perf_counter()
+        actions = search(problem)
+        seconds.append(time.perf_counter() - started)
+    problem = generate_quest(*quest_settings)
+    tracemalloc.start()
+    search(problem)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'seconds': min(seconds),
+            'expansions': problem.expansions,
+            'peak_bytes': peak,
+            'cost': (None if actions is None else
+                     sum(problem.cost[action] for action in actions)),
+            'length': None if actions is None else len(actions)}
+
+
+def run(repeat=3):
+    """
+    Run every search on every quest.
+    :param repeat: (int) number of timed runs per pair
+    :return: (dictionary) 'quest search' -> measurements
+    """
+    results = {}
+    for quest, settings in QUESTS.items():
+        for name, search in SEARCHES.items():
+            results[quest + ' ' + name] = measure(search, settings, repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Find the runs that got worse than the baseline.  Time, expansions
+    and memory may grow by the threshold; the solution cost may not
+    grow at all, and a quest that was solved must still be solved.  The
+    length is not checked: an equally cheap plan may take more steps.
+    :param results: (dictionary) measurements of this run
+    :param baseline: (dictionary) stored measurements
+    :param threshold: (float) allowed relative increase, e.g. 0.2
+    :return: list of strings describing each regression
+    """
+    regressions = []
+    for key, measured in sorted(results.items()):
+        if key not in baseline:
+            continue
+        before = baseline[key].get('cost')
+        after = measured['cost']
+        if before is not None and (after is None or after > before):
+            regressions.append('{}: cost {} -> {}'.format(
+                key, before, after))
+        for metric in ('seconds', 'expansions', 'peak_bytes'):
+            before = baseline[key][metric]
+            after = measured[metric]
+            if metric == 'seconds' and after - before < TIME_NOISE:
+                continue
+            if after > before * (1 + threshold):
+                regressions.append('{}: {} {:.6g} -> {:.6g}'.format(
+                    key, metric, before, after))
+    return regressions
+
+
+def get_arguments():
+    """
+    Parse and validate the command line arguments
+    :return: the parsed arguments
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--baseline',
+                        help='JSON file of stored measurements to compare to')
+    parser.add_argument('--save',
+                        help='JSON file to store these measurements in')
+    parser.add_argument('--threshold',
+                        help='allowed relative slowdown, e.g. 0.2 for 20%%',
+                        type=float,
+                        default=0.2)
+    parser.add_argument('--repeat',
+                        help='timed runs per search, the fastest is kept',
+                        type=int,
+                        default=3)
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    results = run(arguments.repeat)
+    print('{:40} {:>10} {:>10} {:>12} {:>7} {:>7}'.format(
+        'quest search', 'ms', 'expanded', 'peak KiB', 'cost', 'length'))
+    for key, measured in results.items():
+        print('{:40} {:10.2f} {:10} {:12.1f} {:>7} {:>7}'.format(
+            key, measured['seconds'] * 1000, measured['expansions'],
+            measured['peak_bytes'] / 1024, str(measured['cost']),
+            str(measured['length'])))
+    if arguments.save:
+        with open(arguments.save, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=1, sort_keys=True)
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, arguments.threshold)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
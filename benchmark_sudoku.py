@@ -0,0 +1,225 @@
+# ----------------------------------------------------------------------
+# Name:     benchmark_sudoku
+# Purpose:  Repeatable benchmark of the sudoku solving modes on graded
+#           puzzle sets, compared against a stored baseline
+# ----------------------------------------------------------------------
+"""
+Sudoku benchmark.
+
+Every solving mode is run on the puzzle sets shipped in the puzzles
+directory (easy, hard, pathological and 25x25), skipping the modes that
+are hopeless on a set.  Wall time (best of the repeats, summed over the set),
+assignments tried, backtracks, AC-3 revisions and constraint checks are
+reported side by side, and compared against a baseline file when one is
+given.  The bitset backend counts assignments, backtracks and revisions.
+csp.CSP has no counters of its own, so the csp backend counts the checks
+of the board's constraint: those made by AC-3 as revisions and those
+made by the backtracking search as checks.
+Usage:  benchmark_sudoku.py [--baseline FILE] [--save FILE]
+                            [--threshold FRACTION] [--repeat N] [--check]
+Examples:
+benchmark_sudoku.py --save sudoku_baseline.json
+benchmark_sudoku.py --baseline sudoku_baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import sudoku
+import sudoku_bulk
+
+PUZZLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzles')
+
+# the solving modes: name -> f(puzzle, n) returning (solution, solver)
+MODES = {
+    'q1/csp': lambda puzzle, n: sudoku.q1(puzzle, "csp", n),
+    'q1/bitset': lambda puzzle, n: sudoku.q1(puzzle, "bitset", n),
+    'q2/csp': lambda puzzle, n: sudoku.q2(puzzle, "csp", n),
+    'q2/bitset': lambda puzzle, n: sudoku.q2(puzzle, "bitset", n),
+    'q3/csp': lambda puzzle, n: sudoku.q3(puzzle, "csp", n),
+    'q3/bitset': lambda puzzle, n: sudoku.q3(puzzle, "bitset", n),
+    'q4': lambda puzzle, n: sudoku.q4(puzzle, n=n),
+    'q5': lambda puzzle, n: sudoku.q5(puzzle, n=n),
+}
+
+# the puzzle sets: name -> the modes that finish on it in reasonable time
+# (q1 with either backend on the hard puzzles, and the csp backend on the
+# pathological ones, take minutes per puzzle)
+SETS = {
+    'easy': tuple(MODES),
+    'hard': ('q2/csp', 'q2/bitset', 'q3/csp', 'q3/bitset', 'q4', 'q5'),
+    'pathological': ('q3/bitset', 'q4', 'q5'),
+    '25x25': ('q5',),
+}
+
+# the sets whose puzzles all have a unique solution, see --check
+UNIQUE = ('easy', 'hard', 'pathological')
+
+# the solver attributes reported, when the solver has them
+COUNTERS = ('assignments', 'backtracks', 'revisions', 'checks')
+
+# timing differences below this many seconds are treated as noise
+TIME_NOISE = 0.002
+
+
+def load_puzzles(name):
+    """
+    :param name: (string) the name of a puzzle set, e.g. 'easy'
+    :return: list of (puzzle (dictionary), n) tuples
+    """
+    with open(os.path.join(PUZZLES, name + '.txt')) as puzzle_file:
+        return [sudoku_bulk.parse_puzzle(line)
+                for chunk in sudoku_bulk.read_chunks(puzzle_file, 100)
+                for number, line in chunk]
+
+
+def check_puzzles(name):
+    """
+    Check that every puzzle of a set has exactly one solution.
+    :param name: (string) the name of a puzzle set
+    :return: list of the (1 based) positions of the bad puzzles
+    """
+    bad = []
+    for position, (puzzle, n) in enumerate(load_puzzles(name), 1):
+        solution, links = sudoku.q4(puzzle, limit=2, n=n)
+        if links.count != 1:
+            bad.append(position)
+    return bad
+
+
+def measure(mode, puzzles, repeat):
+    """
+    Run one solving mode on a set of puzzles.
+    :param mode: (a function) f(puzzle, n) returning (solution, solver)
+    :param puzzles: (list) of (puzzle, n) tuples
+    :param repeat: (int) number of timed runs per puzzle, the fastest
+        is kept
+    :return: (dictionary) seconds, number of puzzles solved, and the
+        total of each counter (None when the solver doesn't count it)
+    """
+    results = {'seconds': 0.0, 'solved': 0}
+    results.update((counter, None) for counter in COUNTERS)
+    for puzzle, n in puzzles:
+        seconds = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            solution, solver = mode(puzzle, n)
+            seconds.append(time.perf_counter() - started)
+        results['seconds'] += min(seconds)
+        results['solved'] += solution is not None
+        for counter in COUNTERS:
+            count = getattr(solver, counter, None)
+            if count is not None:
+                results[counter] = (results[counter] or 0) + count
+    return results
+
+
+def run(repeat=3):
+    """
+    Run every mode on every puzzle set it is meant for.
+    :param repeat: (int) number of timed runs per puzzle
+    :return: (dictionary) 'set mode' -> measurements
+    """
+    results = {}
+    for name, modes in SETS.items():
+        puzzles = load_puzzles(name)
+        for mode in modes:
+            results[name + ' ' + mode] = measure(MODES[mode], puzzles,
+                                                 repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Find the runs that got worse than the baseline.
+    :param results: (dictionary) measurements of this run
+    :param baseline: (dictionary) stored measurements
+    :param threshold: (float) allowed relative increase, e.g. 0.2
+    :return: list of strings describing each regression
+    """
+    regressions = []
+    for key, measured in sorted(results.items()):
+        if key not in baseline:
+            continue
+        if measured['solved'] < baseline[key]['solved']:
+            regressions.append('{}: solved {} -> {}'.format(
+                key, baseline[key]['solved'], measured['solved']))
+        for metric in ('seconds',) + COUNTERS:
+            before = baseline[key].get(metric)
+            after = measured[metric]
+            if before is None or after is None:
+                continue
+            if metric == 'seconds' and after - before < TIME_NOISE:
+                continue
+            if after > before * (1 + threshold):
+                regressions.append('{}: {} {:.6g} -> {:.6g}'.format(
+                    key, metric, before, after))
+    return regressions
+
+
+def get_arguments():
+    """
+    Parse and validate the command line arguments
+    :return: the parsed arguments
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--baseline',
+                        help='JSON file of stored measurements to compare to')
+    parser.add_argument('--save',
+                        help='JSON file to store these measurements in')
+    parser.add_argument('--threshold',
+                        help='allowed relative slowdown, e.g. 0.2 for 20%%',
+                        type=float,
+                        default=0.2)
+    parser.add_argument('--repeat',
+                        help='timed runs per puzzle, the fastest is kept',
+                        type=int,
+                        default=3)
+    parser.add_argument('--check',
+                        help='check that every puzzle has a unique solution '
+                             'first, and exit with status 1 if one has not',
+                        action='store_true')
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    if arguments.check:
+        bad = 0
+        for name in UNIQUE:
+            for position in check_puzzles(name):
+                print('{} puzzle {} has no unique solution'.format(
+                    name, position))
+                bad += 1
+        if bad:
+            sys.exit(1)
+    results = run(arguments.repeat)
+    row = '{:24} {:>10} {:>8} {:>12} {:>11} {:>11} {:>11} {:>7}'
+    print(row.format(
+        'set mode', 'ms', 'speedup', 'assignments', 'backtracks',
+        'revisions', 'checks', 'solved'))
+    reference = {}  # set -> seconds of its first mode
+    for key, measured in results.items():
+        name = key.split()[0]
+        reference.setdefault(name, measured['seconds'])
+        print(row.format(
+            key, '{:.2f}'.format(measured['seconds'] * 1000),
+            '{:.1f}x'.format(reference[name] / max(measured['seconds'],
+                                                   1e-9)),
+            *('-' if measured[counter] is None else measured[counter]
+              for counter in COUNTERS), measured['solved']))
+    if arguments.save:
+        with open(arguments.save, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=1, sort_keys=True)
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, arguments.threshold)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+# ----------------------------------------------------------------------
+# Name:     bucket_queue
+# Purpose:  Bucketed (Dial's) priority queue for integer path costs
+# ----------------------------------------------------------------------
+import heapq
+import itertools
+import data_structures  # a private proprietary dependent class
+
+# the bucket queue keeps one bucket per priority up to the largest one
+# pushed: past this priority it moves to a binary heap instead
+MAX_PRIORITY = 1 << 16
+
+# largest action cost for which make_fringe picks a bucket queue, since
+# pop scans an empty bucket for every priority step between two costs
+MAX_BUCKET_COST = 64
+
+
+class BucketQueue(object):
+    """
+    Priority queue with O(1) push and pop for small non-negative integer
+    priorities, such as the f values of a search whose action costs are
+    all integers.  Items are kept in one bucket per priority, and within
+    a bucket items with the lower tie value (the heuristic value for A*)
+    are popped first.  If a fractional, negative or larger than
+    MAX_PRIORITY priority is ever pushed, the queue quietly moves
+    everything into a binary heap and carries on with the same ordering.
+
+    Attributes:
+    buckets (list) priority -> dictionary of tie value -> list of items
+    lowest (int) no item has a priority below this index
+    count (int) number of items in the queue
+    heap (list) the binary heap, None while the queue is bucketed
+    """
+
+    def __init__(self):
+        self.buckets = []
+        self.lowest = 0
+        self.count = 0
+        self.heap = None
+        self.order = itertools.count()  # FIFO tie breaker inside the heap
+
+    def push(self, item, priority, tie=0):
+        """
+        Add an item to the queue.
+        :param item: the item to add
+        :param priority: (number) lower priorities are popped first
+        :param tie: (number) breaks ties on priority, lower first
+        :return: None
+        """
+        self.count += 1
+        if self.heap is None:
+            if 0 <= priority <= MAX_PRIORITY and priority == int(priority):
+                priority = int(priority)
+                while len(self.buckets) <= priority:
+                    self.buckets.append({})
+                self.buckets[priority].setdefault(tie, []).append(item)
+                if priority < self.lowest:
+                    self.lowest = priority
+                return
+            self._to_heap()
+        heapq.heappush(self.heap, (priority, tie, next(self.order), item))
+
+    def pop(self):
+        """
+        Remove and return the item with the lowest priority (and the
+        lowest tie value among those).
+        :return: the item removed
+        """
+        if self.count == 0:
+            raise IndexError('pop from an empty BucketQueue')
+        self.count -= 1
+        if self.heap is not None:
+            return heapq.heappop(self.heap)[-1]
+        while not self.buckets[self.lowest]:
+            self.lowest += 1
+        bucket = self.buckets[self.lowest]
+        tie = min(bucket)
+        items = bucket[tie]
+        item = items.pop()
+        if not items:
+            del bucket[tie]
+        return item
+
+    def empty(self):
+        """
+        :return: True if the queue holds no items, False otherwise
+        """
+        return self.count == 0
+
+    def __len__(self):
+        return self.count
+
+    def _to_heap(self):
+        """
+        Move every bucketed item into a binary heap.
+        :return: None
+        """
+        self.heap = []
+        for priority in range(self.lowest, len(self.buckets)):
+            for tie, items in self.buckets[priority].items():
+                for item in items:
+                    self.heap.append((priority, tie, next(self.order), item))
+        heapq.heapify(self.heap)
+        self.buckets = []
+
+
+def integer_costs(problem):
+    """
+    Check whether every action cost of the problem is an integer.
+    :param problem: (a Problem object) representing the quest
+    :return: True if the problem's cost map only holds integers
+    """
+    cost = getattr(problem, 'cost', None)
+    return (isinstance(cost, dict) and bool(cost) and
+            all(isinstance(c, int) and c >= 0 for c in cost.values()))
+
+
+def make_fringe(problem):
+    """
+    Choose the fringe for a cost ordered search of the given problem.
+    :param problem: (a Problem object) representing the quest
+    :return: a BucketQueue when every action cost is an integer no
+        larger than MAX_BUCKET_COST, a data_structures.PriorityQueue
+        otherwise
+    """
+    if (integer_costs(problem) and
+            max(problem.cost.values()) <= MAX_BUCKET_COST):
+        return BucketQueue()
+    return data_structures.PriorityQueue()
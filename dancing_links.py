@@ -0,0 +1,152 @@
+# ----------------------------------------------------------------------
+# Name:     dancing_links
+# Purpose:  Knuth's Algorithm X with Dancing Links for exact cover
+# ----------------------------------------------------------------------
+
+
+class DancingLinks(object):
+    """
+    Exact cover solver: pick a set of rows so that every column is
+    covered by exactly one of them.  The sparse matrix is kept as
+    circular doubly linked lists stored in flat arrays, so covering and
+    uncovering a column only relinks a few array entries.
+
+    Arguments:
+    columns (int) number of columns of the matrix
+    rows (list) each row is a list of the column numbers it covers
+
+    Attributes:
+    count (int) number of solutions found by the last search
+    solutions (list) the solutions found, each a list of row numbers
+    updates (int) number of node unlinks, a measure of the work done
+    """
+
+    def __init__(self, columns, rows):
+        # node 0 is the root, nodes 1..columns are the column headers
+        self.left = [column - 1 for column in range(columns + 1)]
+        self.right = [column + 1 for column in range(columns + 1)]
+        self.left[0] = columns
+        self.right[columns] = 0
+        self.up = list(range(columns + 1))
+        self.down = list(range(columns + 1))
+        self.column = list(range(columns + 1))
+        self.row = [-1] * (columns + 1)
+        self.size = [0] * (columns + 1)
+        for number, row in enumerate(rows):
+            first = None
+            for column in row:
+                header = column + 1
+                node = len(self.column)
+                self.column.append(header)
+                self.row.append(number)
+                # insert at the bottom of the column
+                self.up.append(self.up[header])
+                self.down.append(header)
+                self.down[self.up[header]] = node
+                self.up[header] = node
+                self.size[header] += 1
+                # insert at the end of the row
+                if first is None:
+                    first = node
+                    self.left.append(node)
+                    self.right.append(node)
+                else:
+                    self.left.append(self.left[first])
+                    self.right.append(first)
+                    self.right[self.left[first]] = node
+                    self.left[first] = node
+        self.count = 0
+        self.solutions = []
+        self.updates = 0
+
+    def solve(self, limit=1):
+        """
+        Search for exact covers.
+        :param limit: (int) stop after this many solutions, None for all
+        :return: (list) the solutions found, each a list of row numbers
+        """
+        self.count = 0
+        self.solutions = []
+        self._search([], limit)
+        return self.solutions
+
+    def _search(self, chosen, limit):
+        """
+        Algorithm X: cover the column with the fewest rows left, then
+        try each of its rows in turn.
+        :param chosen: (list) the rows chosen so far
+        :param limit: (int) stop after this many solutions, or None
+        :return: True once the limit is reached
+        """
+        right, down, column = self.right, self.down, self.column
+        if right[0] == 0:
+            self.count += 1
+            self.solutions.append(list(chosen))
+            return limit is not None and self.count >= limit
+        header = right[0]
+        best = header
+        while header != 0:
+            if self.size[header] < self.size[best]:
+                best = header
+            header = right[header]
+        if self.size[best] == 0:
+            return False
+        self._cover(best)
+        node = down[best]
+        while node != best:
+            chosen.append(self.row[node])
+            other = right[node]
+            while other != node:
+                self._cover(column[other])
+                other = right[other]
+            done = self._search(chosen, limit)
+            other = self.left[node]
+            while other != node:
+                self._uncover(column[other])
+                other = self.left[other]
+            chosen.pop()
+            if done:
+                self._uncover(best)
+                return True
+            node = down[node]
+        self._uncover(best)
+        return False
+
+    def _cover(self, header):
+        """
+        Remove a column and every row that covers it.
+        :param header: (int) the column header node
+        :return: None
+        """
+        left, right, up, down = self.left, self.right, self.up, self.down
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        node = down[header]
+        while node != header:
+            other = right[node]
+            while other != node:
+                down[up[other]] = down[other]
+                up[down[other]] = up[other]
+                self.size[self.column[other]] -= 1
+                self.updates += 1
+                other = right[other]
+            node = down[node]
+
+    def _uncover(self, header):
+        """
+        Undo _cover, relinking in the exact reverse order.
+        :param header: (int) the column header node
+        :return: None
+        """
+        left, right, up, down = self.left, self.right, self.up, self.down
+        node = up[header]
+        while node != header:
+            other = left[node]
+            while other != node:
+                self.size[self.column[other]] += 1
+                down[up[other]] = other
+                up[down[other]] = other
+                other = left[other]
+            node = up[node]
+        right[left[header]] = header
+        left[right[header]] = header
@@ -0,0 +1,195 @@
+# ----------------------------------------------------------------------
+# Name:     distance_tables
+# Purpose:  Precomputed true distances to every medal (pattern database
+#           heuristic), stored in memory-mappable files
+# ----------------------------------------------------------------------
+import hashlib
+import heapq
+import json
+import numpy
+
+
+class DistanceTables(object):
+    """
+    Exact cost from every square of a maze to every medal, computed
+    once per maze with a backward Dijkstra search from each medal.
+    A DistanceTables object is itself a heuristic function: the cost
+    to the farthest remaining medal is admissible and, unlike the
+    Manhattan based heuristics, it knows about the walls.
+
+    Arguments:
+    medals (tuple) the medal positions, in table order
+    distances (numpy array) distances[i, row, column] is the cost of
+        reaching medals[i] from square (row, column), inf if unreachable
+    maze (string) digest of the maze the tables were built for
+
+    Attributes:
+    medals (tuple) the medal positions, in table order
+    distances (numpy array) the cost-to-medal tables
+    maze (string) digest of the maze the tables were built for
+    index (dictionary) medal position -> table number
+    """
+
+    def __init__(self, medals, distances, maze=None):
+        self.medals = tuple(medals)
+        self.distances = distances
+        self.maze = maze
+        self.index = {medal: i for i, medal in enumerate(self.medals)}
+
+    def __call__(self, state, problem):
+        """
+        Same signature as the heuristic functions.
+        :param state: A state is represented by a tuple containing:
+                the current position (row, column) of Sammy the Spartan
+                a tuple containing the positions of the remaining medals
+        :param problem: (a Problem object) representing the quest
+        :return: the cost of reaching the farthest remaining medal
+        """
+        sammy, medals = state
+        if not medals:
+            return 0
+        row, column = sammy
+        return float(max(self.distances[self.index[medal], row, column]
+                         for medal in medals))
+
+    def distance(self, position, medal):
+        """
+        :param position: (tuple) a square (row, column) of the maze
+        :param medal: (tuple) the position of one of the medals
+        :return: the cost of reaching medal from position
+        """
+        row, column = position
+        return float(self.distances[self.index[medal], row, column])
+
+    def save(self, path):
+        """
+        Write the tables to a .npy file that load_tables can memory-map,
+        and the medals, board shape and maze digest they were built for
+        to a header file next to it (path + '.json').  The tables are
+        written to path itself, whatever its extension, which is the
+        name load_tables reads back.
+        :param path: (string) name of the .npy file
+        :return: None
+        """
+        with open(path, 'wb') as table_file:  # numpy.save(path) adds .npy
+            numpy.save(table_file, numpy.asarray(self.distances))
+        with open(path + '.json', 'w') as header_file:
+            json.dump(_header(self.medals, self.distances.shape, self.maze),
+                      header_file)
+
+
+def build_tables(problem):
+    """
+    Run a backward Dijkstra search from every medal of the quest.
+    The maze is discovered through problem.expand, starting from the
+    start position.
+    :param problem: (a Problem object) representing the quest
+    :return: DistanceTables for the problem's maze and medals
+    """
+    start, medals = problem.start_state()
+    medals = tuple(sorted(medals))
+    return _build(medals, _predecessors(problem, start, medals))
+
+
+def _build(medals, predecessors):
+    """
+    Run a backward Dijkstra search from every medal.
+    :param medals: (tuple) the sorted medal positions
+    :param predecessors: (dictionary) the maze, as returned by
+        _predecessors
+    :return: DistanceTables for the maze and medals
+    """
+    rows = max(row for row, column in predecessors) + 1
+    columns = max(column for row, column in predecessors) + 1
+    distances = numpy.full((len(medals), rows, columns), numpy.inf,
+                           dtype=numpy.float32)
+    for i, medal in enumerate(medals):
+        if medal not in predecessors:
+            continue  # the medal can't be reached at all
+        table = distances[i]
+        table[medal] = 0
+        fringe = [(0, medal)]
+        while fringe:
+            cost, position = heapq.heappop(fringe)
+            if cost > table[position]:
+                continue  # stale entry
+            for previous, step_cost in predecessors[position]:
+                if cost + step_cost < table[previous]:
+                    table[previous] = cost + step_cost
+                    heapq.heappush(fringe, (cost + step_cost, previous))
+    return DistanceTables(medals, distances, _digest(predecessors))
+
+
+def load_tables(problem, path):
+    """
+    Memory-map the tables saved for this maze, or build and save them
+    if the file does not exist yet or was made for other medals or
+    another maze.  Checking the maze walks it once, which is much
+    cheaper than the Dijkstra search from every medal.
+    :param problem: (a Problem object) representing the quest
+    :param path: (string) name of the .npy file for this maze
+    :return: DistanceTables for the problem's maze and medals
+    """
+    start, medals = problem.start_state()
+    medals = tuple(sorted(medals))
+    predecessors = _predecessors(problem, start, medals)
+    maze = _digest(predecessors)
+    try:
+        with open(path + '.json') as header_file:
+            header = json.load(header_file)
+        distances = numpy.load(path, mmap_mode='r')
+    except (OSError, ValueError):
+        header = distances = None  # missing or unreadable
+    if (distances is not None and
+            header == _header(medals, distances.shape, maze)):
+        return DistanceTables(medals, distances, maze)
+    tables = _build(medals, predecessors)
+    tables.save(path)
+    return tables
+
+
+def _header(medals, shape, maze):
+    """
+    :param medals: (tuple) the medal positions, in table order
+    :param shape: (tuple) the shape of the distances array
+    :param maze: (string) digest of the maze
+    :return: (dictionary) what a saved table was built for, as stored
+        in its JSON header
+    """
+    return {'medals': [list(medal) for medal in medals],
+            'shape': list(shape),
+            'maze': maze}
+
+
+def _digest(predecessors):
+    """
+    :param predecessors: (dictionary) the maze, as returned by
+        _predecessors
+    :return: (string) a digest of the reachable squares and the moves
+        between them with their costs
+    """
+    edges = sorted((position, sorted(moves))
+                   for position, moves in predecessors.items())
+    return hashlib.sha1(repr(edges).encode()).hexdigest()
+
+
+def _predecessors(problem, start, medals):
+    """
+    Discover the squares reachable from the start position.
+    :param problem: (a Problem object) representing the quest
+    :param start: (tuple) the start position
+    :param medals: (tuple) the medals, used to build states to expand
+    :return: (dictionary) position -> list of (previous position, cost)
+        pairs, one for each move leading into that position
+    """
+    predecessors = {start: []}
+    fringe = [start]
+    while fringe:
+        position = fringe.pop()
+        for (child, child_medals), action, action_cost in \
+                problem.expand((position, medals)):
+            if child not in predecessors:
+                predecessors[child] = []
+                fringe.append(child)
+            predecessors[child].append((position, action_cost))
+    return predecessors
@@ -3,39 +3,549 @@
 # Purpose:  Implement A star algorithm and some heuristics
 # ----------------------------------------------------------------------
 import data_structures  # a private proprietary dependent class
+import bisect
+import collections
+import functools
 import math
+import heapq
+import itertools
+import time
+import bucket_queue
+import lru_table
+import search_stats
+import uninformed_search
 
-def astar(problem, heuristic):
+def astar(problem, heuristic, stats=None, weight=1, cache_heuristic=None):
     """
     A* graph search algorithm
     returns a solution for the given search problem
+    A child is only pushed when it improves on the best known cost to
+    its state, and fringe entries that have since been beaten are thrown
+    away when popped.  When every action cost is an integer the fringe
+    is a bucket queue, which breaks ties on f in favour of the lower h.
     :param
     problem (a Problem object) representing the quest
             see Problem class definition in spartanquest.py
     heuristic (a function) the heuristic function to be used
+    stats (a SearchStats or dictionary) optional, receives the search
+            counters (see search_stats.py) and the number of pushes
+            avoided under the key 'pushes_avoided'
+    weight (number) optional, weighted A* orders the fringe by
+            f = g + weight * h, the solution then costs at most weight
+            times the optimal cost (for a consistent heuristic)
+    cache_heuristic (HeuristicCache) optional, a cache of the heuristic
+            values by state that outlives the search, so that the
+            searches on the same problem share it (a search scores each
+            state about once, so a cache used by a single search saves
+            nothing).  It is used instead of heuristic.  True still
+            wraps heuristic in a new cache, for the old callers.  The
+            hits and misses of this search are added to stats.
     :return: list of actions representing the solution to the quest
                 or None if there is no solution
     """
+    return uninformed_search.complete(astar_steps(problem, heuristic, stats,
+                                                  weight, cache_heuristic))
+
+
+def astar_steps(problem, heuristic, stats=None, weight=1,
+                cache_heuristic=None):
+    """
+    A* graph search, one expansion at a time: a generator that yields
+    every node right after expanding it, and returns the solution when
+    it is exhausted, see uninformed_search.bfs_steps.  Every node keeps
+    the heuristic value it was pushed with in its h attribute.
+    :param
+    problem, heuristic, stats, weight, cache_heuristic: see astar
+    :return: list of actions representing the solution to the quest
+                or None if there is no solution
+    """
+    cache = cache_heuristic
+    if cache is True:
+        cache = HeuristicCache(heuristic)
+    elif cache is False:
+        cache = None
+    if cache is not None:
+        heuristic = cache
+        hits, misses = cache.hits, cache.misses
     closed = set()
-    fringe = data_structures.PriorityQueue()
+    best_cost = {}  # cheapest known cost to reach each state
+    fringe = bucket_queue.make_fringe(problem)
+    bucketed = isinstance(fringe, bucket_queue.BucketQueue)
+    expand = problem.expand
+    if stats is not None:
+        fringe, expand, heuristic = search_stats.instrument(
+            stats, fringe, expand, heuristic)
     state = problem.start_state()
     root = data_structures.Node(state)
-    fringe.push(root, root.cumulative_cost + heuristic(state, problem))
-
-    while True:
-        if fringe.empty():
-            return None  # Failure -  no solution was found
+    root.h = heuristic(state, problem)
+    best_cost[state] = root.cumulative_cost
+    fringe.push(root, root.cumulative_cost + weight * root.h)
+    avoided = 0
+    stale = 0
+    solution = None  # Failure -  unless a solution is found
+    while not fringe.empty():
         node = fringe.pop()
+        if node.cumulative_cost > best_cost[node.state]:
+            stale += 1
+            continue  # stale entry, a cheaper path was pushed later
         if problem.is_goal(node.state):
-            return node.actions()
+            solution = node.actions()
+            break
         if node.state not in closed:
             closed.add(node.state)
-            for child_state, action, action_cost in problem.expand(node.state):
-                h = heuristic(child_state, problem)
+            for child_state, action, action_cost in expand(node.state):
+                g = node.cumulative_cost + action_cost
+                if (child_state in closed or
+                        g >= best_cost.get(child_state, math.inf)):
+                    avoided += 1
+                    continue
+                best_cost[child_state] = g
                 child_node = data_structures.Node(child_state, node, action)
-                child_node.cumulative_cost = node.cumulative_cost + action_cost
+                child_node.cumulative_cost = g
+                child_node.h = heuristic(child_state, problem)
+                h = weight * child_node.h
                 f = child_node.cumulative_cost + h
-                fringe.push(child_node, f)
+                if bucketed:
+                    fringe.push(child_node, f, h)  # ties go to the lower h
+                else:
+                    fringe.push(child_node, f)
+            yield node
+    if stats is not None:
+        search_stats.finish(stats, len(closed), avoided + stale)
+        stats['pushes_avoided'] = avoided
+        if cache is not None:
+            stats['heuristic_hits'] = cache.hits - hits
+            stats['heuristic_misses'] = cache.misses - misses
+    return solution
+
+def idastar(problem, heuristic, cache_size=0):
+    """
+    Iterative deepening A* search algorithm
+    returns a solution for the given search problem
+    Runs depth first searches bounded by f = g + h, raising the bound to
+    the smallest f that was cut off each time, so memory only grows with
+    the depth of the solution.
+    :param
+    problem (a Problem object) representing the quest
+            see Problem class definition in spartanquest.py
+    heuristic (a function) the heuristic function to be used
+    cache_size (int) optional, number of states remembered with their
+            cheapest g within one iteration, to avoid re-expanding the
+            same state through a costlier path (0 disables the cache)
+    :return: list of actions representing the solution to the quest
+                or None if there is no solution
+    """
+    bound = heuristic(problem.start_state(), problem)
+    while True:
+        solution, bound = _bounded_search(problem, heuristic, bound,
+                                          cache_size)
+        if solution is not None:
+            return solution
+        if bound == math.inf:
+            return None  # Failure -  no solution was found
+
+
+def _bounded_search(problem, heuristic, bound, cache_size):
+    """
+    One depth first iteration of IDA*.  The recursion is unrolled onto
+    an explicit stack so deep quests don't hit Python's recursion limit.
+    :param problem: (a Problem object) representing the quest
+    :param heuristic: (a function) the heuristic function to be used
+    :param bound: (number) the largest f value allowed in this iteration
+    :param cache_size: (int) maximum number of states in the cache
+    :return: a tuple with the list of actions (None if no solution was
+        found within the bound) and the bound for the next iteration
+    """
+    state = problem.start_state()
+    if problem.is_goal(state):
+        return [], bound
+    next_bound = math.inf
+    cache = {}  # state -> cheapest g it was entered with
+    on_path = {state}  # avoid cycles along the current path
+    actions = []
+    stack = [(state, 0, iter(problem.expand(state)))]
+    while stack:
+        state, g, successors = stack[-1]
+        for child_state, action, action_cost in successors:
+            if child_state in on_path:
+                continue
+            child_g = g + action_cost
+            if cache.get(child_state, math.inf) <= child_g:
+                continue  # already entered as cheaply in this iteration
+            f = child_g + heuristic(child_state, problem)
+            if f > bound:
+                next_bound = min(next_bound, f)
+                continue
+            if problem.is_goal(child_state):
+                return actions + [action], bound
+            if child_state in cache or len(cache) < cache_size:
+                cache[child_state] = child_g
+            on_path.add(child_state)
+            actions.append(action)
+            stack.append((child_state, child_g,
+                          iter(problem.expand(child_state))))
+            break
+        else:  # every successor was tried, backtrack
+            stack.pop()
+            on_path.discard(state)
+            if stack:
+                actions.pop()
+    return None, next_bound
+
+
+def anytime_astar(problem, heuristic, weight=3, step=0.5, time_limit=None):
+    """
+    Anytime repairing A* (ARA*) search algorithm
+    A generator that quickly finds a first solution with weighted A*,
+    then lowers the weight step by step down to 1, each time repairing
+    the previous search instead of starting over: the cheapest paths
+    found so far are kept, and states whose cost improved after they
+    were expanded are put back on the fringe.
+    :param
+    problem (a Problem object) representing the quest
+            see Problem class definition in spartanquest.py
+    heuristic (a function) the heuristic function to be used
+    weight (number) the weight on h used for the first search
+    step (number) how much the weight is lowered after each solution
+    time_limit (number) optional, seconds after which the search stops
+    :return: yields tuples with a list of actions and its suboptimality
+            bound: the solution costs at most bound times the optimal
+            cost (for a consistent heuristic).  Nothing is yielded if
+            there is no solution.
+    """
+    started = time.perf_counter()
+    state = problem.start_state()
+    root = data_structures.Node(state)
+    if problem.is_goal(state):
+        yield root.actions(), 1
+        return
+    best = {state: root}  # state -> Node of the cheapest path known
+    h_values = {state: heuristic(state, problem)}
+    order = itertools.count()  # FIFO tie breaker
+    fringe = [(weight * h_values[state], next(order), root)]
+    inconsistent = {}  # improved after expansion, state -> Node
+    goal = None  # Node of the best solution found so far
+    while True:
+        closed = set()
+        while fringe and (goal is None or
+                          fringe[0][0] < goal.cumulative_cost):
+            if (time_limit is not None and
+                    time.perf_counter() - started >= time_limit):
+                return
+            node = heapq.heappop(fringe)[-1]
+            if best[node.state] is not node:
+                continue  # stale entry, a cheaper path was found later
+            closed.add(node.state)
+            for child_state, action, action_cost in problem.expand(node.state):
+                g = node.cumulative_cost + action_cost
+                if child_state in best and g >= best[child_state].cumulative_cost:
+                    continue
+                child_node = data_structures.Node(child_state, node, action)
+                child_node.cumulative_cost = g
+                best[child_state] = child_node
+                if problem.is_goal(child_state):
+                    # goal states are never expanded
+                    if goal is None or g < goal.cumulative_cost:
+                        goal = child_node
+                    continue
+                if child_state not in h_values:
+                    h_values[child_state] = heuristic(child_state, problem)
+                if child_state in closed:
+                    inconsistent[child_state] = child_node
+                else:
+                    f = g + weight * h_values[child_state]
+                    heapq.heappush(fringe, (f, next(order), child_node))
+        if goal is None:
+            return  # Failure -  no solution was found
+        waiting = [entry[-1] for entry in fringe
+                   if best[entry[-1].state] is entry[-1]]
+        waiting.extend(inconsistent.values())
+        lower = min([node.cumulative_cost + h_values[node.state]
+                     for node in waiting] + [goal.cumulative_cost])
+        bound = min(weight, goal.cumulative_cost / lower) if lower else 1
+        yield goal.actions(), max(bound, 1)
+        if bound <= 1:
+            return
+        # repair: lower the weight and re-key everything still waiting
+        weight = max(weight - step, 1)
+        fringe = [(node.cumulative_cost + weight * h_values[node.state],
+                   next(order), node) for node in waiting]
+        heapq.heapify(fringe)
+        inconsistent = {}
+
+
+def jps(problem, heuristic, jumps=None):
+    """
+    Jump Point Search on 4-connected grids
+    returns a solution for the given search problem
+    When every move costs the same, many shortest paths are symmetric.
+    Only the canonical one is kept: vertical moves come first, and a
+    path turns from horizontal to vertical only where a wall forces it.
+    Straight runs are jumped over without putting the squares along
+    them on the fringe, and A* is run on the jump points (medals, forced
+    turns and squares from which a jump point is in sight).
+    The jumps are looked up in a JumpTable, which learns the maze
+    through problem.expand and is shared by every medal subset.  A new
+    table scans far more squares than astar expands in one search, so
+    it only pays off when it is shared by the searches on the same maze:
+    without a table, or when the action costs are not uniform, jps runs
+    astar instead.
+    :param
+    problem (a Problem object) representing the quest
+            see Problem class definition in spartanquest.py
+    heuristic (a function) the heuristic function to be used
+    jumps (JumpTable) the table shared by the searches on this maze,
+            JumpTable(problem) for the first of them
+    :return: list of actions representing the solution to the quest
+                or None if there is no solution
+    """
+    costs = set(getattr(problem, 'cost', {}).values())
+    if jumps is None or len(costs) != 1:
+        return astar(problem, heuristic)
+    step_cost = costs.pop()
+    closed = set()
+    best_cost = {}
+    fringe = bucket_queue.make_fringe(problem)
+    bucketed = isinstance(fringe, bucket_queue.BucketQueue)
+    state = problem.start_state()
+    root = data_structures.Node(state)
+    best_cost[state] = root.cumulative_cost
+    fringe.push(root, root.cumulative_cost + heuristic(state, problem))
+    while not fringe.empty():
+        node = fringe.pop()
+        if node.cumulative_cost > best_cost[node.state]:
+            continue
+        if problem.is_goal(node.state):
+            # each action of the jump point path is a (direction, count)
+            return [direction for direction, count in node.actions()
+                    for _ in range(count)]
+        if node.state in closed:
+            continue
+        closed.add(node.state)
+        position, metals = node.state
+        for direction in jumps.directions(node):
+            jump = jumps.jump(position, direction, metals)
+            if jump is None:
+                continue
+            child_position, count = jump
+            child_state = (child_position,
+                           tuple(m for m in metals if m != child_position))
+            g = node.cumulative_cost + count * step_cost
+            if (child_state in closed or
+                    g >= best_cost.get(child_state, math.inf)):
+                continue
+            best_cost[child_state] = g
+            child_node = data_structures.Node(child_state, node,
+                                              (direction, count))
+            child_node.cumulative_cost = g
+            h = heuristic(child_state, problem)
+            if bucketed:
+                fringe.push(child_node, g + h, h)  # ties go to the lower h
+            else:
+                fringe.push(child_node, g + h)
+    return None  # Failure -  no solution was found
+
+
+# a horizontal run of open squares, west to east: its squares, their
+# indexes, and the indexes of the forced turns when travelling east and
+# when travelling west
+_Segment = collections.namedtuple('_Segment',
+                                  'squares index forced_east forced_west')
+
+
+class JumpTable(object):
+    """
+    The jumps of jps, learnt lazily from problem.expand and memoized.
+    Everything stored depends on the maze alone, not on the medals, so
+    the work is shared by every medal subset of a search, and a table
+    can be passed on to later searches on the same maze.
+    Each horizontal run of open squares is scanned once, recording its
+    forced turns.  A vertical jump stops at the first square whose run
+    holds a forced turn ahead of it, or a medal; the forced turn part is
+    memoized for every square along the way, and the medals are checked
+    against the memoized run afterwards.
+
+    Arguments:
+    problem (a Problem object) representing the quest
+
+    Attributes:
+    problem (a Problem object) used to learn the maze
+    moves (dictionary) position -> {direction: next position}
+    segments (dictionary) position -> the _Segment holding it
+    runs (dictionary) (position, 'N' or 'S') -> (count, found): the
+        number of squares to the first square whose segment has a
+        forced turn ahead (found True), or to the wall (found False)
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.moves = {}
+        self.segments = {}
+        self.runs = {}
+
+    def step(self, position, direction):
+        """
+        Move one square, learning the maze through problem.expand.
+        :param position: (tuple) the square (row, column) to move from
+        :param direction: (string) 'N', 'S', 'E' or 'W'
+        :return: the square reached, or None if there is a wall
+        """
+        try:
+            moves = self.moves[position]
+        except KeyError:
+            metals = self.problem.start_state()[1]
+            moves = self.moves[position] = {
+                action: child_state[0] for child_state, action, action_cost
+                in self.problem.expand((position, metals))}
+        return moves.get(direction)
+
+    def segment(self, position):
+        """
+        :param position: (tuple) an open square
+        :return: (_Segment) the horizontal run of open squares holding it
+        """
+        segment = self.segments.get(position)
+        if segment is not None:
+            return segment
+        west = position
+        while self.step(west, 'W') is not None:
+            west = self.step(west, 'W')
+        squares = [west]
+        while self.step(squares[-1], 'E') is not None:
+            squares.append(self.step(squares[-1], 'E'))
+        sides = [{side for side in _VERTICAL
+                  if self.step(square, side) is not None}
+                 for square in squares]
+        # forced turn: the square beside us is open but the one beside
+        # the previous square was a wall
+        forced_east = [i for i in range(1, len(squares))
+                       if sides[i] - sides[i - 1]]
+        forced_west = [i for i in range(len(squares) - 1)
+                       if sides[i] - sides[i + 1]]
+        segment = _Segment(squares, {square: i for i, square
+                                     in enumerate(squares)},
+                           forced_east, forced_west)
+        for square in squares:
+            self.segments[square] = segment
+        return segment
+
+    def jump(self, position, direction, metals):
+        """
+        Travel straight from position until reaching a jump point.
+        :param position: (tuple) the square (row, column) to start from
+        :param direction: (string) 'N', 'S', 'E' or 'W'
+        :param metals: (tuple) the positions of the remaining medals
+        :return: a tuple with the jump point and the number of steps
+            taken, or None if a wall is reached first
+        """
+        if direction in _HORIZONTAL:
+            return self._horizontal(position, direction, metals)
+        count, found = self._run(position, direction)
+        row, column = position
+        sign = -1 if direction == 'N' else 1
+        for metal in metals:
+            # a medal in sight of the run, before where it stops
+            steps = (metal[0] - row) * sign
+            if 0 < steps <= count and (not found or steps < count):
+                square = (metal[0], column)
+                if metal in self.segment(square).index:
+                    count, found = steps, True
+        if not found:
+            return None
+        return (row + sign * count, column), count
+
+    def directions(self, node):
+        """
+        Directions worth jumping in from a jump point.
+        :param node: (Node) the jump point, its action is the (direction,
+            count) jump that reached it
+        :return: list of directions
+        """
+        parent = node.parent
+        if parent is None or len(node.state[1]) < len(parent.state[1]):
+            return ['N', 'S', 'E', 'W']  # start, or a medal was just picked up
+        direction = node.action[0]
+        if direction in _VERTICAL:
+            return [direction, 'E', 'W']
+        position = node.state[0]
+        previous = self.step(position, _OPPOSITE[direction])
+        return [direction] + [side for side in _VERTICAL
+                              if self.step(position, side) is not None
+                              and self.step(previous, side) is None]
+
+    def _horizontal(self, position, direction, metals):
+        """
+        Horizontal jump: the nearest medal or forced turn ahead in the
+        segment.
+        :param position: (tuple) the square (row, column) to start from
+        :param direction: (string) 'E' or 'W'
+        :param metals: (tuple) the positions of the remaining medals
+        :return: a tuple with the jump point and the number of steps
+            taken, or None if a wall is reached first
+        """
+        segment = self.segment(position)
+        start = segment.index[position]
+        if direction == 'E':
+            turn = bisect.bisect_right(segment.forced_east, start)
+            turns = segment.forced_east[turn:turn + 1]
+            ahead = [i for i in map(segment.index.get, metals)
+                     if i is not None and i > start]
+            stops = ahead + turns
+            stop = min(stops) if stops else None
+        else:
+            turn = bisect.bisect_left(segment.forced_west, start)
+            turns = segment.forced_west[max(turn - 1, 0):turn]
+            ahead = [i for i in map(segment.index.get, metals)
+                     if i is not None and i < start]
+            stops = ahead + turns
+            stop = max(stops) if stops else None
+        if stop is None:
+            return None
+        return segment.squares[stop], abs(stop - start)
+
+    def _sees_turn(self, position):
+        """
+        :param position: (tuple) an open square
+        :return: True if a horizontal jump from position, either way,
+            reaches a forced turn
+        """
+        segment = self.segment(position)
+        i = segment.index[position]
+        return bool((segment.forced_east and segment.forced_east[-1] > i) or
+                    (segment.forced_west and segment.forced_west[0] < i))
+
+    def _run(self, position, direction):
+        """
+        Vertical run from position, ignoring the medals, memoized for
+        every square along the way.
+        :param position: (tuple) the square (row, column) to start from
+        :param direction: (string) 'N' or 'S'
+        :return: a tuple with the number of steps to the first square
+            that sees a forced turn (found True), or to the last square
+            before the wall (found False)
+        """
+        path = []  # squares whose run goes on through the next square
+        square = position
+        while (square, direction) not in self.runs:
+            following = self.step(square, direction)
+            if following is None:
+                self.runs[(square, direction)] = (0, False)
+            elif self._sees_turn(following):
+                self.runs[(square, direction)] = (1, True)
+            else:
+                path.append(square)
+                square = following
+        count, found = self.runs[(square, direction)]
+        for square in reversed(path):
+            count += 1
+            self.runs[(square, direction)] = (count, found)
+        return self.runs[(position, direction)]
+
+
+_OPPOSITE = {'N': 'S', 'S': 'N', 'E': 'W', 'W': 'E'}
+_VERTICAL = ('N', 'S')
+_HORIZONTAL = ('E', 'W')
+
 
 def null_heuristic(state, problem):
     """
@@ -151,6 +661,99 @@ def gen_heuristic(state, problem):
         h.append(total)
     return max(h)
 
+def mst_heuristic(state, problem):
+    """
+    Admissible heuristic for quests with many medals: the distance to
+    the nearest medal plus the weight of a minimum spanning tree over
+    all the remaining medals.  Any route that collects the medals first
+    reaches one of them and then travels along a path through all of
+    them, which costs at least as much as the spanning tree.
+    Distances are Manhattan distances where each row step costs the
+    cheaper of N/S and each column step the cheaper of E/W.
+    :param
+    state: A state is represented by a tuple containing:
+                the current position (row, column) of Sammy the Spartan
+                a tuple containing the positions of the remaining medals
+    problem: (a Problem object) representing the quest
+    :return: the heuristic value of the state
+    """
+    sammy, metals = state
+    if not metals:
+        return 0
+    row_cost = min(problem.cost.get('N'), problem.cost.get('S'))
+    column_cost = min(problem.cost.get('E'), problem.cost.get('W'))
+    row, column = sammy
+    # a handful of medals: plain Python beats numpy's call overhead here
+    nearest = min(row_cost * abs(medal_row - row) +
+                  column_cost * abs(medal_column - column)
+                  for medal_row, medal_column in metals)
+    return nearest + _medal_tree(metals, row_cost, column_cost)
+
+
+@functools.lru_cache(maxsize=65536)
+def _medal_tree(metals, row_cost, column_cost):
+    """
+    Weight of the minimum spanning tree over a set of medals (Prim's
+    algorithm on the full pairwise distance matrix).  Cached per medal
+    subset, since A* meets the same subsets over and over (picking up a
+    medal keeps the others in order, so a subset is always the same
+    tuple).
+    :param metals: (tuple) the positions of the medals
+    :param row_cost: (number) cost of one step between rows
+    :param column_cost: (number) cost of one step between columns
+    :return: the weight of the spanning tree
+    """
+    import numpy  # only mst_heuristic needs numpy, load it when asked for
+    positions = numpy.array(metals)
+    rows = positions[:, 0]
+    columns = positions[:, 1]
+    pairwise = (row_cost * numpy.abs(rows[:, None] - rows[None, :]) +
+                column_cost * numpy.abs(columns[:, None] - columns[None, :]))
+    in_tree = numpy.zeros(len(metals), dtype=bool)
+    in_tree[0] = True
+    closest = pairwise[0].copy()  # cheapest edge into the tree
+    tree = 0
+    for _ in range(len(metals) - 1):
+        candidates = numpy.where(in_tree, numpy.inf, closest)
+        nearest = int(candidates.argmin())
+        tree += closest[nearest]
+        in_tree[nearest] = True
+        closest = numpy.minimum(closest, pairwise[nearest])
+    return tree.item() if len(metals) > 1 else 0
+
+
+class HeuristicCache(lru_table.LRUTable):
+    """
+    Memoize any heuristic function by state, evicting the least recently
+    used values once the cache is full.  A cache is meant to be used
+    with a single problem, since the problem is not part of the key.
+    The counters and hit_rate() come from lru_table.LRUTable.
+
+    Arguments:
+    heuristic (a function) the heuristic function to be memoized
+    max_size (int) maximum number of states kept in the cache
+
+    Attributes:
+    heuristic (a function) the heuristic function being memoized
+    values (OrderedDict) state -> heuristic value, oldest use first
+        (the table's entries)
+    """
+
+    def __init__(self, heuristic, max_size=100000):
+        super().__init__(max_size)
+        self.heuristic = heuristic
+        self.values = self.entries
+
+    def __call__(self, state, problem):
+        """
+        Same signature as the heuristic functions.
+        :param state: the state to evaluate
+        :param problem: (a Problem object) representing the quest
+        :return: the heuristic value of the state
+        """
+        return self.lookup(state, self.heuristic, state, problem)
+
+
 def manhattan_distance(point1, point2):
     """
     Compute the Manhattan distance between two points.
@@ -0,0 +1,111 @@
+# ----------------------------------------------------------------------
+# Name:     likelihood_tables
+# Purpose:  Precomputed sensor likelihoods per model and cached distance
+#           grids per sensor position for the Belief updates
+# ----------------------------------------------------------------------
+import weakref
+import numpy
+import lru_table
+
+_tables = weakref.WeakKeyDictionary()  # model -> its LikelihoodTable
+
+
+class LikelihoodTable(object):
+    """
+    Table of P(color | distance) for one sensor model.  A color's row is
+    filled the first time that color is sensed, for every distance up
+    to the board diameter, and grown if a larger board asks for it.
+    The model is assumed not to change once its table exists.
+
+    Arguments:
+    model (Model object) models the relationship between the treasure
+        location and the sensor data
+
+    Attributes:
+    model (Model object) the sensor model of the table
+    rows (dictionary) color -> numpy array of the probability of sensing
+        that color at each distance
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.rows = {}
+
+    def probabilities(self, color, diameter):
+        """
+        :param color: (string) color detected
+        :param diameter: (int) the largest distance needed
+        :return: (numpy array) the probability of sensing color at each
+            distance from 0 to diameter (or more), not to be modified
+        """
+        row = self.rows.get(color)
+        if row is None or len(row) <= diameter:
+            row = numpy.array([self.model.psonargivendist(color, distance)
+                               for distance in range(diameter + 1)])
+            row.setflags(write=False)
+            self.rows[color] = row
+        return row
+
+
+def get_table(model):
+    """
+    :param model: (Model object) a sensor model
+    :return: (LikelihoodTable) the table shared by every Belief updated
+        with this model, a new one if the model can't be weakly
+        referenced
+    """
+    try:
+        table = _tables.get(model)
+    except TypeError:  # not weakly referenceable, don't keep it alive
+        return LikelihoodTable(model)
+    if table is None:
+        # the table only holds a proxy, so that the model can still be
+        # garbage collected along with its cache entry
+        table = _tables[model] = LikelihoodTable(weakref.proxy(model))
+    return table
+
+
+class DistanceGrids(lru_table.LRUTable):
+    """
+    Size bounded table of the Manhattan distance grids around sensor
+    positions, evicting the least recently used positions first.  The
+    grids use the smallest integer type that holds the board diameter.
+    The counters and hit_rate() come from lru_table.LRUTable.
+
+    Arguments:
+    size (int) the number of rows/columns of the board
+    max_size (int) maximum number of positions kept in the cache
+
+    Attributes:
+    size (int) the number of rows/columns of the board
+    grids (OrderedDict) position -> size x size numpy array of the
+        distances from that position, oldest use first (the table's
+        entries)
+    """
+
+    def __init__(self, size, max_size=32):
+        super().__init__(max_size)
+        self.size = size
+        self.grids = self.entries
+        self._steps = numpy.arange(
+            size, dtype=numpy.min_scalar_type(-2 * size))
+
+    def distances(self, position):
+        """
+        :param position: (tuple) a position on the board
+        :return: (numpy array) size x size Manhattan distances from the
+            given position, not to be modified
+        """
+        return self.lookup(position, self._grid, position)
+
+    def _grid(self, position):
+        """
+        :param position: (tuple) a position on the board
+        :return: (numpy array) the read-only distance grid
+        """
+        x, y = position
+        steps = self._steps
+        grid = (numpy.abs(steps - x)[:, None] +
+                numpy.abs(steps - y)[None, :])
+        grid.setflags(write=False)
+        return grid
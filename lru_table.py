@@ -0,0 +1,68 @@
+# ----------------------------------------------------------------------
+# Name:     lru_table
+# Purpose:  Size bounded memo table evicting the least recently used
+#           entries, shared by the heuristic, successor and grid caches
+# ----------------------------------------------------------------------
+import collections
+
+
+class LRUTable(object):
+    """
+    Size bounded table of computed values, evicting the least recently
+    used keys first and counting how often a value was found.  The
+    caches built on it (informed_search.HeuristicCache,
+    successor_cache.SuccessorCache, likelihood_tables.DistanceGrids)
+    only say what a key is and how its value is computed.
+
+    Arguments:
+    max_size (int) maximum number of keys kept in the table
+
+    Attributes:
+    max_size (int) maximum number of keys kept in the table
+    entries (OrderedDict) key -> value, oldest use first
+    hits (int) number of lookups answered from the table
+    misses (int) number of lookups that computed the value
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, compute, *arguments):
+        """
+        :param key: the hashable key of the value
+        :param compute: (a function) called with the arguments to
+            compute the value when the key is missing
+        :param arguments: passed on to compute
+        :return: the value of the key
+        """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            value = compute(*arguments)
+            self.entries[key] = value
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            return value
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def hit_rate(self):
+        """
+        :return: (float) fraction of the lookups answered from the table
+        """
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def clear(self):
+        """
+        Forget every key and reset the counters.
+        :return: None
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,200 @@
+# ----------------------------------------------------------------------
+# Name:     search_driver
+# Purpose:  Run bfs, ucs and A* step by step under expansion and time
+#           budgets so that many searches can share one event loop
+# ----------------------------------------------------------------------
+import asyncio
+import time
+import informed_search
+import search_stats
+import uninformed_search
+
+
+class SearchDriver(object):
+    """
+    Resumable graph search.  The searches themselves are the generators
+    uninformed_search.bfs_steps, uninformed_search.ucs_steps and
+    informed_search.astar_steps, which pause after every expansion, so
+    the driver behaves exactly like bfs, ucs and astar; step() advances
+    the generator until an expansion or time budget is used up.
+
+    Arguments:
+    problem (a Problem object) representing the quest
+            see Problem class definition in spartanquest.py
+    algorithm (string) 'bfs', 'ucs' or 'astar'
+    heuristic (a function) the heuristic function used by 'astar',
+            null_heuristic if not given
+
+    Attributes:
+    problem (a Problem object) the quest being searched
+    algorithm (string) 'bfs', 'ucs' or 'astar'
+    heuristic (a function) the heuristic function, None for bfs and ucs
+    stats (SearchStats) the counters of the search, see search_stats.py
+    solution (list) the actions of the solution, None until found
+    done (boolean) True once the search has finished or was cancelled
+    cancelled (boolean) True if the search was cancelled
+    paused (boolean) True while the search is paused
+    best_node (Node) the expanded node closest to a goal so far: lowest
+            h, then highest cost
+    """
+
+    def __init__(self, problem, algorithm='astar', heuristic=None):
+        if algorithm not in ('bfs', 'ucs', 'astar'):
+            raise ValueError('unknown algorithm: {}'.format(algorithm))
+        if algorithm == 'astar' and heuristic is None:
+            heuristic = informed_search.null_heuristic
+        if algorithm != 'astar':
+            heuristic = None
+        self.problem = problem
+        self.algorithm = algorithm
+        self.heuristic = heuristic
+        self.stats = search_stats.SearchStats()
+        self.solution = None
+        self.done = False
+        self.cancelled = False
+        self.paused = False
+        self.best_node = None
+        self._best_key = None
+        if algorithm == 'bfs':
+            self._search = uninformed_search.bfs_steps(problem, self.stats)
+        elif algorithm == 'ucs':
+            self._search = uninformed_search.ucs_steps(problem, self.stats)
+        else:
+            self._search = informed_search.astar_steps(problem, heuristic,
+                                                       self.stats)
+
+    @property
+    def expanded(self):
+        """
+        :return: (int) number of states expanded so far
+        """
+        return self.stats.get('expanded', 0)
+
+    @property
+    def generated(self):
+        """
+        :return: (int) number of children generated so far
+        """
+        return self.stats.get('generated', 0)
+
+    @property
+    def fringe_size(self):
+        """
+        :return: (int) number of nodes currently on the fringe
+        """
+        return self.stats.get('pushed', 0) - self.stats.get('popped', 0)
+
+    def step(self, max_expansions=None, max_microseconds=None):
+        """
+        Advance the search until one of the budgets is used up, the
+        search finishes, or it is paused.
+        :param max_expansions: (int) optional, most expansions to run
+        :param max_microseconds: (number) optional, most time to run
+        :return: True if the search is done, False otherwise
+        """
+        if self.done or self.paused:
+            return self.done
+        deadline = None
+        if max_microseconds is not None:
+            deadline = time.perf_counter() + max_microseconds / 1e6
+        count = 0
+        while True:
+            try:
+                node = next(self._search)
+            except StopIteration as finished:
+                self.solution = finished.value
+                self.done = True
+                break
+            self._track(node)
+            count += 1
+            if self.paused:
+                break
+            if max_expansions is not None and count >= max_expansions:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        return self.done
+
+    def steps(self, max_expansions=None, max_microseconds=None):
+        """
+        Generator that runs one budgeted step() each time it is
+        advanced, until the search is done or paused.
+        :param max_expansions: (int) optional, expansions per step
+        :param max_microseconds: (number) optional, time per step
+        :return: yields the driver itself after every step
+        """
+        while not self.done and not self.paused:
+            self.step(max_expansions, max_microseconds)
+            yield self
+
+    async def run_async(self, max_expansions=100, max_microseconds=None):
+        """
+        Run the search to completion, giving control back to the event
+        loop after every step.  While paused, the coroutine keeps
+        waiting for resume() or cancel().
+        :param max_expansions: (int) optional, expansions per step
+        :param max_microseconds: (number) optional, time per step
+        :return: list of actions representing the solution to the quest
+            or None if there is no solution (or it was cancelled)
+        """
+        while not self.done:
+            self.step(max_expansions, max_microseconds)
+            # while paused, poll gently instead of spinning
+            await asyncio.sleep(0.001 if self.paused else 0)
+        return self.solution
+
+    def pause(self):
+        """
+        Stop advancing the search until resume() is called.
+        :return: None
+        """
+        self.paused = True
+
+    def resume(self):
+        """
+        Allow the search to advance again after pause().
+        :return: None
+        """
+        self.paused = False
+
+    def cancel(self):
+        """
+        Stop the search for good and release its fringe.
+        :return: None
+        """
+        self.cancelled = True
+        self.done = True
+        self._search.close()
+
+    def best_plan(self):
+        """
+        :return: list of actions leading to the best node so far
+        """
+        if self.best_node is None:
+            return []
+        return self.best_node.actions()
+
+    def report(self):
+        """
+        :return: (dictionary) the progress of the search
+        """
+        return {'algorithm': self.algorithm,
+                'done': self.done,
+                'cancelled': self.cancelled,
+                'paused': self.paused,
+                'solved': self.solution is not None,
+                'expanded': self.expanded,
+                'generated': self.generated,
+                'fringe_size': self.fringe_size}
+
+    def _track(self, node):
+        """
+        Remember the node if it is the closest to a goal so far.
+        :param node: (Node) the node just expanded
+        :return: None
+        """
+        h = node.h if self.heuristic else 0  # set by astar_steps
+        key = (h, -node.cumulative_cost)
+        if self._best_key is None or key <= self._best_key:
+            self._best_key = key
+            self.best_node = node
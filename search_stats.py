@@ -0,0 +1,136 @@
+# ----------------------------------------------------------------------
+# Name:     search_stats
+# Purpose:  Counters, timers and hooks for bfs, ucs and A*
+# ----------------------------------------------------------------------
+import json
+import time
+
+# counters filled in by every instrumented search ('reopened' stays 0 for
+# bfs, ucs and astar, which never take a state back out of the closed set)
+COUNTERS = ('expanded', 'generated', 'pushed', 'popped',
+            'duplicates_skipped', 'reopened', 'peak_fringe', 'closed',
+            'expand_time', 'heuristic_time')
+
+
+class SearchStats(dict):
+    """
+    Statistics of one search run.  Pass an instance as the stats
+    argument of bfs, ucs or astar: the counters are stored as dictionary
+    items, so any plain dictionary works too, and the optional hooks are
+    called as the search goes.  When no stats object is given the
+    searches skip all the bookkeeping.
+
+    Arguments:
+    on_expand (a function) optional, called with each state expanded
+    on_push (a function) optional, called with each node pushed
+    on_pop (a function) optional, called with each node popped
+
+    Attributes:
+    on_expand, on_push, on_pop (functions or None) the hooks
+    """
+
+    def __init__(self, on_expand=None, on_push=None, on_pop=None):
+        super().__init__()
+        self.on_expand = on_expand
+        self.on_push = on_push
+        self.on_pop = on_pop
+
+    def to_json(self, **options):
+        """
+        :param options: passed on to json.dumps (indent, ...)
+        :return: (string) the counters as a JSON object
+        """
+        return json.dumps(self, sort_keys=True, **options)
+
+
+def instrument(stats, fringe, expand, heuristic=None):
+    """
+    Reset the counters and wrap the parts of a search that are measured.
+    :param stats: (dictionary or SearchStats) receives the counters
+    :param fringe: the fringe of the search
+    :param expand: (a function) the problem's expand method
+    :param heuristic: (a function) optional, the heuristic function
+    :return: a tuple with the wrapped fringe, expand and heuristic
+    """
+    stats.update(dict.fromkeys(COUNTERS, 0))
+    on_expand = getattr(stats, 'on_expand', None)
+
+    def timed_expand(state):
+        if on_expand is not None:
+            on_expand(state)
+        started = time.perf_counter()
+        children = list(expand(state))
+        stats['expand_time'] += time.perf_counter() - started
+        stats['expanded'] += 1
+        stats['generated'] += len(children)
+        return children
+
+    def timed_heuristic(state, problem):
+        started = time.perf_counter()
+        value = heuristic(state, problem)
+        stats['heuristic_time'] += time.perf_counter() - started
+        return value
+
+    if heuristic is None:
+        return CountingFringe(fringe, stats), timed_expand, None
+    return CountingFringe(fringe, stats), timed_expand, timed_heuristic
+
+
+def finish(stats, closed, duplicates):
+    """
+    Record the counters only known once the search is over.
+    :param stats: (dictionary or SearchStats) receives the counters
+    :param closed: (int) size of the closed set
+    :param duplicates: (int) nodes skipped because their state was
+        already closed or reached as cheaply
+    :return: None
+    """
+    stats['closed'] = closed
+    stats['duplicates_skipped'] = duplicates
+
+
+class CountingFringe(object):
+    """
+    Wrap a fringe to count pushes and pops, track its peak size and
+    call the push and pop hooks.
+
+    Arguments:
+    fringe the fringe to wrap (Queue, PriorityQueue or BucketQueue)
+    stats (dictionary or SearchStats) receives the counters
+    """
+
+    def __init__(self, fringe, stats):
+        self.fringe = fringe
+        self.stats = stats
+        self.size = 0
+        self.on_push = getattr(stats, 'on_push', None)
+        self.on_pop = getattr(stats, 'on_pop', None)
+
+    def push(self, item, *priority):
+        """
+        Same arguments as the push method of the wrapped fringe.
+        """
+        self.fringe.push(item, *priority)
+        self.size += 1
+        self.stats['pushed'] += 1
+        if self.size > self.stats['peak_fringe']:
+            self.stats['peak_fringe'] = self.size
+        if self.on_push is not None:
+            self.on_push(item)
+
+    def pop(self):
+        """
+        :return: the item popped from the wrapped fringe
+        """
+        item = self.fringe.pop()
+        self.size -= 1
+        self.stats['popped'] += 1
+        if self.on_pop is not None:
+            self.on_pop(item)
+        return item
+
+    def empty(self):
+        """
+        :return: True if the wrapped fringe is empty, False otherwise
+        """
+        return self.fringe.empty()
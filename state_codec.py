@@ -0,0 +1,162 @@
+# ----------------------------------------------------------------------
+# Name:     state_codec
+# Purpose:  Pack quest states into single integers so the closed set
+#           and the fringe of bfs, ucs and A* stay small and hash fast
+# ----------------------------------------------------------------------
+
+
+class StateCodec(object):
+    """
+    Encode a state (position, medals) as one integer: the remaining
+    medals as a bitmask in the high part and the row-major index of the
+    position in the low part.  The codec also keeps the tables that let
+    EncodedProblem expand states without decoding them: the medal bit
+    of every square and the moves out of every square, learnt as the
+    squares are first expanded.
+
+    Arguments:
+    rows (int) number of rows of the maze
+    columns (int) number of columns of the maze
+    medals (tuple) positions of all the medals of the quest
+
+    Attributes:
+    columns (int) number of columns of the maze
+    size (int) number of squares of the maze
+    medals (tuple) positions of all the medals, in bit order
+    bits (dictionary) medal position -> its bit in the mask
+    square_bits (list) square index -> the bit of the medal on that
+        square, 0 if there is none
+    moves (list) square index -> tuple of (square index reached, action,
+        action cost), None until the square is first expanded
+    """
+
+    def __init__(self, rows, columns, medals):
+        self.columns = columns
+        self.size = rows * columns
+        self.medals = tuple(medals)
+        self.bits = {medal: 1 << i for i, medal in enumerate(self.medals)}
+        self.square_bits = [0] * self.size
+        for (row, column), bit in self.bits.items():
+            self.square_bits[row * columns + column] = bit
+        self.moves = [None] * self.size
+
+    def encode(self, state):
+        """
+        :param state: a tuple containing the current position (row,
+            column) and a tuple containing the positions of the
+            remaining medals
+        :return: (int) the encoded state
+        """
+        (row, column), metals = state
+        mask = 0
+        for medal in metals:
+            mask |= self.bits[medal]
+        return mask * self.size + row * self.columns + column
+
+    def decode(self, code):
+        """
+        :param code: (int) an encoded state
+        :return: the state as a (position, medals tuple) tuple, with the
+            medals in the order given to the codec
+        """
+        mask, index = divmod(code, self.size)
+        metals = tuple(medal for medal in self.medals
+                       if mask & self.bits[medal])
+        return divmod(index, self.columns), metals
+
+    def heuristic(self, heuristic):
+        """
+        Adapt a heuristic function to encoded states.
+        :param heuristic: (a function) the heuristic function to adapt
+        :return: a function taking an encoded state and an
+            EncodedProblem, as astar expects
+        """
+        def encoded_heuristic(code, problem):
+            return heuristic(self.decode(code),
+                             getattr(problem, 'problem', problem))
+        return encoded_heuristic
+
+
+class EncodedProblem(object):
+    """
+    Wrap a Problem so that its states are StateCodec integers.  bfs, ucs
+    and astar run on it unchanged and return the same action lists;
+    every other attribute (cost, ...) is read from the wrapped problem.
+    States are expanded in integer space: the moves out of a square are
+    asked from the wrapped problem once, and stepping onto a medal
+    square clears that medal's bit.  The goal is to collect every medal,
+    so a state is a goal when its medal mask is empty.
+
+    Arguments:
+    problem (a Problem object) representing the quest
+    codec (StateCodec) the codec for this quest's maze and medals
+
+    Attributes:
+    problem (a Problem object) the wrapped quest
+    codec (StateCodec) the codec used for the states
+    """
+
+    def __init__(self, problem, codec):
+        self.problem = problem
+        self.codec = codec
+
+    def __getattr__(self, name):
+        # only called for missing attributes: don't look up special
+        # methods (pickle, copy) or the wrapped problem itself through
+        # the wrapped problem, which doesn't exist yet while unpickling
+        if name == 'problem' or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.problem, name)
+
+    def start_state(self):
+        """
+        :return: (int) the encoded start state
+        """
+        return self.codec.encode(self.problem.start_state())
+
+    def is_goal(self, code):
+        """
+        :param code: (int) an encoded state
+        :return: True if no medal is left
+        """
+        return code < self.codec.size
+
+    def expand(self, code):
+        """
+        :param code: (int) an encoded state
+        :return: list of (encoded child state, action, action cost)
+        """
+        codec = self.codec
+        size = codec.size
+        mask, index = divmod(code, size)
+        moves = codec.moves[index]
+        if moves is None:
+            moves = codec.moves[index] = self._learn(index)
+        square_bits = codec.square_bits
+        return [((mask & ~square_bits[child]) * size + child, action,
+                 action_cost)
+                for child, action, action_cost in moves]
+
+    def _learn(self, index):
+        """
+        Ask the wrapped problem for the moves out of a square.
+        :param index: (int) the row-major index of the square
+        :return: tuple of (square index reached, action, action cost)
+        """
+        columns = self.codec.columns
+        position = divmod(index, columns)
+        return tuple((row * columns + column, action, action_cost)
+                     for ((row, column), metals), action, action_cost in
+                     self.problem.expand((position, self.codec.medals)))
+
+
+def encode_problem(problem, rows, columns):
+    """
+    Build the codec for a quest and wrap the problem with it.
+    :param problem: (a Problem object) representing the quest
+    :param rows: (int) number of rows of the maze
+    :param columns: (int) number of columns of the maze
+    :return: the EncodedProblem
+    """
+    position, metals = problem.start_state()
+    return EncodedProblem(problem, StateCodec(rows, columns, metals))
@@ -0,0 +1,81 @@
+# ----------------------------------------------------------------------
+# Name:     successor_cache
+# Purpose:  Memoize problem.expand across searches on the same maze
+# ----------------------------------------------------------------------
+import lru_table
+
+
+class SuccessorCache(lru_table.LRUTable):
+    """
+    Size bounded table of expand() results keyed by state, evicting the
+    least recently used states first.  One cache can be shared by every
+    problem on the same maze (different starts, re-planning after a
+    move), since the successors of a state only depend on the maze.
+    The counters, hit_rate() and clear() come from lru_table.LRUTable.
+
+    Arguments:
+    max_size (int) maximum number of states kept in the cache
+
+    Attributes:
+    successors (OrderedDict) state -> tuple of (child state, action,
+        action cost), oldest use first (the table's entries)
+    """
+
+    def __init__(self, max_size=100000):
+        super().__init__(max_size)
+        self.successors = self.entries
+
+    def expand(self, problem, state):
+        """
+        :param problem: (a Problem object) computes the successors on a
+            miss
+        :param state: the state to expand
+        :return: tuple of (child state, action, action cost) tuples
+        """
+        return self.lookup(state, _successors, problem, state)
+
+
+def _successors(problem, state):
+    """
+    :param problem: (a Problem object) representing the quest
+    :param state: the state to expand
+    :return: tuple of (child state, action, action cost) tuples
+    """
+    return tuple(problem.expand(state))
+
+
+class CachedProblem(object):
+    """
+    Wrap any Problem so that its expand() goes through a SuccessorCache.
+    bfs, ucs, astar and the other searches run on it unchanged; every
+    other attribute (start_state, is_goal, cost, ...) comes from the
+    wrapped problem.
+
+    Arguments:
+    problem (a Problem object) representing the quest
+    cache (SuccessorCache) optional, a cache shared with other problems
+        on the same maze, a new one is made if not given
+
+    Attributes:
+    problem (a Problem object) the wrapped quest
+    cache (SuccessorCache) the cache used by expand
+    """
+
+    def __init__(self, problem, cache=None):
+        self.problem = problem
+        self.cache = cache if cache is not None else SuccessorCache()
+
+    def __getattr__(self, name):
+        # only called for missing attributes: don't look up special
+        # methods (pickle, copy) or the wrapped problem itself through
+        # the wrapped problem, which doesn't exist yet while unpickling
+        if name in ('problem', 'cache') or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.problem, name)
+
+    def expand(self, state):
+        """
+        :param state: the state to expand
+        :return: tuple of (child state, action, action cost) tuples
+        """
+        return self.cache.expand(self.problem, state)
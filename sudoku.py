@@ -3,6 +3,9 @@
 # Purpose:  Sudoko puzzle solver with Backtracking search and AC-3 Algorithm
 # ----------------------------------------------------------------------
 import csp # a private proprietary dependent class
+import dancing_links
+import sudoku_bitset
+import sudoku_topology
 
 def get_constrains(neighbors):
     """
@@ -24,98 +27,219 @@ def get_constrains(neighbors):
             return True
     return constrains
 
-def get_neighbors(variables):
+def get_neighbors(variables, n=3):
     """
     get the neighbors for a CSP object.
     :param variables: a list of tuples representing all possible combinations in the puzzle.
+    :param n: the size of a block, the board has n*n rows and columns.
     :return: a dictionary representing binary constraints.
         The dictionary keys are variable names and the values are sets
         containing all the variables that are connected to the key.
         (Variables are connected if they both appear in a constraint)
     """
-    block3 = []
-    x = y = [0, 3, 6]
-    for i in x:
-        l = []
-        for j in y:
-            l = [(a, b) for a in range(i, i + 3) for b in range(j, j + 3)]
-            block3.append(l)
-
-    blocks = [[(a, b) for a in range(0, 9)] for b in range(0, 9)] + [[(a, b) for b in range(0, 9)] for a in
-                                                                     range(0, 9)] + block3
-
-    neighbors = {}
-    for x in variables:
-        nei = set()
-        for b in blocks:
-            if x in b:
-                nei.update(b)
-        nei.discard(x)
-        neighbors[x] = nei
-    return neighbors
-
-def build_csp(puzzle):
+    neighbors = sudoku_topology.get_topology(n).neighbors
+    return {x: set(neighbors[x]) for x in variables}
+
+class CheckCounter(object):
+    """
+    The board's constraint, counting how often it is checked.  csp.CSP
+    keeps no counters of its own, so build_csp hands it a CheckCounter
+    instead of the bare constraint, and q1, q2 and q3 read the count
+    after each solving step.
+
+    Arguments:
+    constraint (a function) f(var1, val1, var2, val2), see get_constrains
+
+    Attributes:
+    constraint (a function) the constraint being counted
+    checks (int) number of calls since the last take()
+    """
+
+    def __init__(self, constraint):
+        self.constraint = constraint
+        self.checks = 0
+
+    def __call__(self, var1, val1, var2, val2):
+        self.checks += 1
+        return self.constraint(var1, val1, var2, val2)
+
+    def take(self):
+        """
+        :return: (int) the number of calls since the last take()
+        """
+        checks, self.checks = self.checks, 0
+        return checks
+
+
+def _record(mysudoku, name):
+    """
+    Store the constraint checks made since the last call on a CSP built
+    by build_csp, under the given attribute name.  The bitset backend
+    keeps its own counters and is left alone.
+    :param mysudoku: the CSP object or BitsetSudoku
+    :param name: (string) 'revisions' for the checks made by AC-3,
+    'checks' for those made by the backtracking search.
+    :return: None
+    """
+    counter = getattr(mysudoku, 'check_counter', None)
+    if counter is not None:
+        setattr(mysudoku, name, counter.take())
+
+def build_csp(puzzle, n=3):
     """
     Create a CSP object representing the puzzle.
+    The neighbors and the constraint come from the shared Topology of
+    the board, so only the domains are built for each puzzle.  The
+    constraint is wrapped in a CheckCounter, kept in the check_counter
+    attribute of the CSP object.
     :param puzzle (dictionary): The dictionary keys are tuples
     (row, column) representing the filled puzzle squares and the values
     are the corresponding numbers assigned to these squares.
+    :param n (int): the size of a block, the board has n*n rows and
+    columns and the values go from 1 to n*n (3 for a 9x9 board).
     :return: CSP object
     """
-    # Enter your code here and remove the pass statement below
-    variables = [(a,b) for a in range(0,9) for b in range(0,9)]
+    topology = sudoku_topology.get_topology(n)
+    values = range(1, topology.size + 1)
     domain = {}
-    for x in variables:
+    for x in topology.variables:
         if x in puzzle:
             domain[x] = {puzzle[x]}
         else:
-            domain[x] = {1, 2, 3, 4, 5, 6, 7, 8, 9}
-    neighbors = get_neighbors(variables)
-    constraint = get_constrains(neighbors)
+            domain[x] = set(values)
 
-    mySudoku = csp.CSP(domain, neighbors, constraint)
+    counter = CheckCounter(topology.constraint)
+    mySudoku = csp.CSP(domain, topology.neighbors, counter)
+    mySudoku.check_counter = counter
     return mySudoku
 
-def q1(puzzle):
+def q1(puzzle, backend="csp", n=3):
     """
     Solve the given puzzle with basic backtracking search
     :param puzzle (dictionary): The dictionary keys are tuples
     (row, column) representing the filled puzzle squares and the values
     are the corresponding numbers assigned to these squares.
+    :param backend (string): "csp" for the csp.CSP solver, "bitset" for
+    the faster sudoku_bitset.BitsetSudoku, which gives the same solution.
+    :param n (int): the size of a block, 3 for a 9x9 board.
     :return: a tuple consisting of a solution (dictionary) and the
-    CSP object.
+    CSP object, which counts the constraint checks, see _record.
     """
-    mysudoku = build_csp(puzzle)
+    if backend == "bitset":
+        mysudoku = sudoku_bitset.BitsetSudoku(puzzle, n)
+    else:
+        mysudoku = build_csp(puzzle, n)
+    _record(mysudoku, 'revisions')
     solution = mysudoku.backtracking_search()
+    _record(mysudoku, 'checks')
     return solution, mysudoku
 
-def q2(puzzle):
+def q2(puzzle, backend="csp", n=3):
     """
     Solve the given puzzle with backtracking search and AC-3 as
     a preprocessing step.
     :param puzzle (dictionary): The dictionary keys are tuples
     (row, column) representing the filled puzzle squares and the values
     are the corresponding numbers assigned to these squares.
+    :param backend (string): "csp" for the csp.CSP solver, "bitset" for
+    the faster sudoku_bitset.BitsetSudoku, which gives the same solution.
+    :param n (int): the size of a block, 3 for a 9x9 board.
     :return: a tuple consisting of a solution (dictionary) and the
-    CSP object.
+    CSP object, which counts the constraint checks, see _record.
     """
-    mysudoku = build_csp(puzzle)
+    if backend == "bitset":
+        mysudoku = sudoku_bitset.BitsetSudoku(puzzle, n)
+    else:
+        mysudoku = build_csp(puzzle, n)
     mysudoku.ac3_algorithm()
+    _record(mysudoku, 'revisions')
     solution = mysudoku.backtracking_search()
+    _record(mysudoku, 'checks')
     return solution, mysudoku
 
 
-def q3(puzzle):
+def q3(puzzle, backend="csp", n=3):
     """
     Solve the given puzzle with backtracking search and MRV ordering and
     AC-3 as a preprocessing step.
     :param puzzle (dictionary): The dictionary keys are tuples
     (row, column) representing the filled puzzle squares and the values
     are the corresponding numbers assigned to these squares.
+    :param backend (string): "csp" for the csp.CSP solver, "bitset" for
+    the faster sudoku_bitset.BitsetSudoku, which gives the same solution.
+    :param n (int): the size of a block, 3 for a 9x9 board.
     :return: a tuple consisting of a solution (dictionary) and the
-    CSP object.
+    CSP object, which counts the constraint checks, see _record.
     """
-    mysudoku = build_csp(puzzle)
+    if backend == "bitset":
+        mysudoku = sudoku_bitset.BitsetSudoku(puzzle, n)
+    else:
+        mysudoku = build_csp(puzzle, n)
     mysudoku.ac3_algorithm()
+    _record(mysudoku, 'revisions')
     solution = mysudoku.backtracking_search("MRV")
+    _record(mysudoku, 'checks')
+    return solution, mysudoku
+
+def q4(puzzle, limit=1, n=3):
+    """
+    Solve the given puzzle as an exact cover problem with Dancing Links.
+    Each row of the matrix places one value in one square; the columns
+    require every square to be filled and every value to appear once in
+    each row, column and block.
+    :param puzzle (dictionary): The dictionary keys are tuples
+    (row, column) representing the filled puzzle squares and the values
+    are the corresponding numbers assigned to these squares.
+    :param limit (int): stop after finding this many solutions, None to
+    count them all.  Use 2 to check that a puzzle has a unique solution.
+    :param n (int): the size of a block, 3 for a 9x9 board.
+    :return: a tuple consisting of a solution (dictionary), None if
+    there is no solution, and the DancingLinks object, whose count
+    attribute holds the number of solutions found.
+    """
+    topology = sudoku_topology.get_topology(n)
+    size = topology.size
+    cells = size * size
+    rows = []
+    placements = []  # matrix row -> (square, value)
+    for cell, (row, column) in enumerate(topology.variables):
+        if (row, column) in puzzle:
+            values = [puzzle[(row, column)]]
+        else:
+            values = range(1, size + 1)
+        block = topology.cell_units[cell][2] - 2 * size
+        for value in values:
+            rows.append([cell,
+                         cells + row * size + value - 1,
+                         2 * cells + column * size + value - 1,
+                         3 * cells + block * size + value - 1])
+            placements.append(((row, column), value))
+    links = dancing_links.DancingLinks(4 * cells, rows)
+    solutions = links.solve(limit)
+    if not solutions:
+        return None, links
+    return dict(placements[row] for row in solutions[0]), links
+
+def q5(puzzle, ordering="MRV", n=3):
+    """
+    Solve the given puzzle with backtracking search that maintains arc
+    consistency (MAC) after every assignment, with the bitset backend.
+    Naked and hidden singles, locked candidates and naked pairs are
+    propagated before the search starts and after every assignment, and
+    MRV learns which units keep failing and restarts the search to use
+    it, which is what makes 16x16 and 25x25 boards practical.  Random
+    25x25 boards with half of the cells given mostly solve well under a
+    second (1.5 s at worst); with 45% given they take from a quarter of
+    a second to several seconds, see the 25x25 set of benchmark_sudoku.
+    :param puzzle (dictionary): The dictionary keys are tuples
+    (row, column) representing the filled puzzle squares and the values
+    are the corresponding numbers assigned to these squares.
+    :param ordering (string): "MRV" for minimum remaining values
+    ordering, None to assign the squares in order.
+    :param n (int): the size of a block, 3 for a 9x9 board.
+    :return: a tuple consisting of a solution (dictionary) and the
+    BitsetSudoku object, which counts the propagations and backtracks.
+    """
+    mysudoku = sudoku_bitset.BitsetSudoku(puzzle, n)
+    solution = mysudoku.backtracking_search(ordering, "MAC")
     return solution, mysudoku
@@ -0,0 +1,420 @@
+# ----------------------------------------------------------------------
+# Name:     sudoku_bitset
+# Purpose:  Sudoku specialized CSP backend: domains are bitmasks,
+#           peers are precomputed index arrays and arc revision is done
+#           with bit operations
+# ----------------------------------------------------------------------
+import collections
+import sudoku_topology
+
+# backtracks allowed before the first restart of the MRV MAC search
+RESTART_BACKTRACKS = 50
+
+
+class BitsetSudoku(object):
+    """
+    Sudoku CSP with the same solving steps as csp.CSP (AC-3 and
+    backtracking search with optional MRV ordering), specialized for
+    the all-different constraints of an n^2 x n^2 board.  Bit v - 1 of
+    a domain stands for the value v, and cells are numbered
+    row * size + column as in sudoku_topology.  Under MAC, MRV divides
+    the values left in a cell by the weights of its units, which grow
+    every time propagation runs into a dead end in them, so the search
+    turns to the part of the board that keeps failing (dom/wdeg).
+
+    Arguments:
+    puzzle (dictionary): The dictionary keys are tuples
+    (row, column) representing the filled puzzle squares and the values
+    are the corresponding numbers assigned to these squares.
+    n (int): the size of a block, 3 for the usual 9x9 board
+
+    Attributes:
+    topology (Topology) the shared units and peers of the board
+    size (int) number of rows, columns and values of the board
+    domains (list) cell -> bitmask of the values still possible
+    assignments (int) number of values tried by the backtracking search
+    backtracks (int) number of times the search had to back up
+    revisions (int) number of arcs revised by AC-3
+    propagations (int) number of values removed by MAC propagation
+    weights (list) unit -> 1 + number of dead ends MAC propagation
+        found in the unit
+    restarts (int) number of times the MRV MAC search started over
+    """
+
+    def __init__(self, puzzle, n=3):
+        self.topology = sudoku_topology.get_topology(n)
+        self.size = size = self.topology.size
+        self.domains = [(1 << size) - 1] * (size * size)
+        for (row, column), value in puzzle.items():
+            self.domains[row * size + column] = 1 << (value - 1)
+        self.assignments = 0
+        self.backtracks = 0
+        self.revisions = 0
+        self.propagations = 0
+        self.weights = [1] * len(self.topology.unit_indexes)
+        self.restarts = 0
+
+    def ac3_algorithm(self):
+        """
+        Make every arc consistent.  For all-different constraints, the
+        arc (cell, peer) can only remove a value from cell when the peer
+        is down to that single value.
+        :return: False if a domain became empty, True otherwise
+        """
+        domains = self.domains
+        peers = self.topology.peer_indexes
+        queue = collections.deque(self.topology.arc_indexes)
+        while queue:
+            cell, peer = queue.popleft()
+            self.revisions += 1
+            value = domains[peer]
+            if value & (value - 1) == 0 and domains[cell] & value:
+                domains[cell] &= ~value
+                if not domains[cell]:
+                    return False
+                queue.extend((other, cell) for other in peers[cell]
+                             if other != peer)
+        return True
+
+    def backtracking_search(self, ordering=None, inference=None):
+        """
+        Backtracking search over the current domains.
+        :param ordering: (string) None to assign the cells in order,
+            "MRV" for minimum remaining values ordering
+        :param inference: (string) None for plain backtracking, "MAC"
+            to maintain arc consistency after every assignment
+        :return: the solution (dictionary) with (row, column) keys, or
+            None if the puzzle has no solution
+        """
+        if inference == "MAC":
+            return self._mac_search(ordering == "MRV")
+        values = [0] * len(self.domains)  # 0 if not assigned yet
+        used = [0] * len(self.topology.unit_indexes)  # values taken per unit
+        if not self._backtrack(values, used, ordering == "MRV"):
+            return None
+        return {divmod(cell, self.size): value
+                for cell, value in enumerate(values)}
+
+    def _backtrack(self, values, used, mrv):
+        """
+        Assign one cell and recurse.
+        :param values: (list) the current assignment
+        :param used: (list) values taken in each unit
+        :param mrv: (boolean) use minimum remaining values ordering
+        :return: True once every cell is assigned, False on failure
+        """
+        cell_units = self.topology.cell_units
+        cell = None
+        fewest = self.size + 1
+        for index in range(len(values)):
+            if values[index]:
+                continue
+            if not mrv:
+                cell = index
+                break
+            units = cell_units[index]
+            left = bin(self.domains[index] & ~(used[units[0]] |
+                       used[units[1]] | used[units[2]])).count('1')
+            if left < fewest:
+                cell, fewest = index, left
+        if cell is None:
+            return True
+        units = cell_units[cell]
+        candidates = self.domains[cell] & ~(used[units[0]] |
+                                             used[units[1]] | used[units[2]])
+        while candidates:
+            bit = candidates & -candidates  # lowest value first
+            candidates ^= bit
+            self.assignments += 1
+            values[cell] = bit.bit_length()
+            for unit in units:
+                used[unit] |= bit
+            if self._backtrack(values, used, mrv):
+                return True
+            for unit in units:
+                used[unit] &= ~bit
+        values[cell] = 0
+        self.backtracks += 1
+        return False
+
+    def _mac_search(self, mrv):
+        """
+        Backtracking search maintaining arc consistency.  Every domain
+        reduction is recorded on a trail, and backing up replays the
+        trail instead of copying the domains at each step.  With MRV the
+        search restarts from the top whenever it has backed up
+        RESTART_BACKTRACKS times, half as many again on every restart,
+        so that an early bad choice is revisited with the weights learnt
+        so far instead of being searched exhaustively.
+        :param mrv: (boolean) use minimum remaining values ordering
+        :return: the solution (dictionary) with (row, column) keys, or
+            None if the puzzle has no solution
+        """
+        trail = []  # (cell, domain before the change)
+        singles = [cell for cell, domain in enumerate(self.domains)
+                   if domain & (domain - 1) == 0]
+        if not self._propagate(singles, trail):
+            return None
+        mark = len(trail)
+        allowed = RESTART_BACKTRACKS
+        while True:
+            limit = self.backtracks + allowed if mrv else None
+            solved = self._mac_backtrack(trail, mrv, limit)
+            if solved is not None:
+                break
+            self.restarts += 1
+            allowed += (allowed + 1) // 2
+            while len(trail) > mark:  # undo
+                index, domain = trail.pop()
+                self.domains[index] = domain
+        if not solved:
+            return None
+        return {divmod(cell, self.size): domain.bit_length()
+                for cell, domain in enumerate(self.domains)}
+
+    def _mac_backtrack(self, trail, mrv, limit=None):
+        """
+        Assign one cell, propagate, and recurse.  A cell counts as
+        assigned once its domain is down to a single value.
+        :param trail: (list) the undo log of domain changes
+        :param mrv: (boolean) use minimum remaining values ordering,
+            weighted by the dead ends found in the units of each cell
+        :param limit: (int) optional, give up once the backtracks
+            counter reaches this number
+        :return: True once every domain holds a single value, False if
+            there is no solution below this point, None if the search
+            gave up
+        """
+        domains = self.domains
+        weights = self.weights
+        cell_units = self.topology.cell_units
+        cell = None
+        fewest = None
+        for index in range(len(domains)):
+            domain = domains[index]
+            if domain & (domain - 1) == 0:
+                continue
+            if not mrv:
+                cell = index
+                break
+            row, column, block = cell_units[index]
+            left = bin(domain).count('1') / (weights[row] +
+                                             weights[column] + weights[block])
+            if fewest is None or left < fewest:
+                cell, fewest = index, left
+        if cell is None:
+            return True
+        candidates = domains[cell]
+        while candidates:
+            bit = candidates & -candidates  # lowest value first
+            candidates ^= bit
+            self.assignments += 1
+            mark = len(trail)
+            trail.append((cell, domains[cell]))
+            domains[cell] = bit
+            if self._propagate([cell], trail):
+                solved = self._mac_backtrack(trail, mrv, limit)
+                if solved is not False:
+                    return solved
+            while len(trail) > mark:  # undo
+                index, domain = trail.pop()
+                domains[index] = domain
+        self.backtracks += 1
+        if limit is not None and self.backtracks >= limit:
+            return None
+        return False
+
+    def _propagate(self, queue, trail):
+        """
+        Revise the arcs pointing at cells that just got down to a single
+        value, i.e. remove that value from their peers (naked singles),
+        and keep going with the peers that get down to a single value in
+        turn.  Once that settles, place the values that only fit in one
+        cell of a unit (hidden singles) and start over.  When neither
+        finds anything, remove the locked candidates, then the naked
+        pairs, and start over as soon as one of them removes a value.
+        :param queue: (list) cells whose domain just became a single value
+        :param trail: (list) the undo log of domain changes
+        :return: False if a domain became empty, True otherwise
+        """
+        while True:
+            if not self._naked_singles(queue, trail):
+                return False
+            queue = self._hidden_singles(trail)
+            if queue is None:
+                return False
+            if queue:
+                continue
+            mark = len(trail)
+            queue = self._locked_candidates(trail)
+            if queue is None:
+                return False
+            if len(trail) > mark:
+                continue
+            queue = self._naked_pairs(trail)
+            if queue is None:
+                return False
+            if len(trail) == mark:
+                return True
+
+    def _naked_singles(self, queue, trail):
+        """
+        Remove the value of every single valued cell in queue from its
+        peers, following the peers that become single valued.
+        :param queue: (list) cells whose domain just became a single value
+        :param trail: (list) the undo log of domain changes
+        :return: False if a domain became empty, True otherwise
+        """
+        domains = self.domains
+        peers = self.topology.peer_indexes
+        while queue:
+            cell = queue.pop()
+            bit = domains[cell]
+            for peer in peers[cell]:
+                domain = domains[peer]
+                if domain & bit:
+                    self.propagations += 1
+                    trail.append((peer, domain))
+                    domain &= ~bit
+                    domains[peer] = domain
+                    if not domain:
+                        self._dead_end(peer)
+                        return False
+                    if domain & (domain - 1) == 0:
+                        queue.append(peer)
+        return True
+
+    def _hidden_singles(self, trail):
+        """
+        Find the values that fit in only one cell of some unit and place
+        them there.
+        :param trail: (list) the undo log of domain changes
+        :return: list of the cells that became single valued, None if a
+            value has no place left in some unit
+        """
+        domains = self.domains
+        every_value = (1 << self.size) - 1
+        placed = []
+        for number, unit in enumerate(self.topology.unit_indexes):
+            once = twice = 0
+            for cell in unit:
+                twice |= once & domains[cell]
+                once |= domains[cell]
+            if once != every_value:
+                self.weights[number] += 1
+                return None  # some value can't go anywhere in the unit
+            hidden = once & ~twice
+            if not hidden:
+                continue
+            for cell in unit:
+                domain = domains[cell]
+                if domain & hidden and domain & (domain - 1):
+                    single = domain & hidden
+                    if single & (single - 1):
+                        self.weights[number] += 1
+                        return None  # two values need the same cell
+                    self.propagations += 1
+                    trail.append((cell, domain))
+                    domains[cell] = single
+                    placed.append(cell)
+        return placed
+
+    def _locked_candidates(self, trail):
+        """
+        Where a row or column crosses a block, a value the block can
+        only hold in the crossing cells is taken out of the rest of the
+        row or column (pointing), and a value the row or column can only
+        hold in the crossing cells is taken out of the rest of the block
+        (claiming).
+        :param trail: (list) the undo log of domain changes
+        :return: list of the cells that became single valued, None if a
+            domain became empty
+        """
+        domains = self.domains
+        segments = self.topology.segment_indexes
+        unions = []  # segment -> values still possible in its cells
+        for cells in segments:
+            union = 0
+            for cell in cells:
+                union |= domains[cell]
+            unions.append(union)
+        placed = []
+        for segment, (line, block) in enumerate(self.topology.segment_peers):
+            line_union = block_union = 0
+            for other in line:
+                line_union |= unions[other]
+            for other in block:
+                block_union |= unions[other]
+            inside = unions[segment]
+            for others, locked in ((line, inside & ~block_union),
+                                   (block, inside & ~line_union)):
+                if not locked:
+                    continue
+                for other in others:
+                    if not unions[other] & locked:
+                        continue
+                    unions[other] &= ~locked
+                    for cell in segments[other]:
+                        if not self._remove(cell, locked, trail, placed):
+                            return None
+        return placed
+
+    def _naked_pairs(self, trail):
+        """
+        Two cells of a unit left with the same two values take both of
+        them, so these values are removed from the rest of the unit.
+        :param trail: (list) the undo log of domain changes
+        :return: list of the cells that became single valued, None if a
+            domain became empty
+        """
+        domains = self.domains
+        placed = []
+        for unit in self.topology.unit_indexes:
+            pairs = {}  # two values -> the first cell holding just them
+            for cell in unit:
+                domain = domains[cell]
+                rest = domain & (domain - 1)  # domain without its lowest
+                if not rest or rest & (rest - 1):
+                    continue  # not exactly two values
+                if domain not in pairs:
+                    pairs[domain] = cell
+                    continue
+                first = pairs[domain]
+                for other in unit:
+                    if other != cell and other != first:
+                        if not self._remove(other, domain, trail, placed):
+                            return None
+        return placed
+
+    def _remove(self, cell, values, trail, placed):
+        """
+        Take some values out of the domain of a cell.
+        :param cell: (int) the cell
+        :param values: (int) bitmask of the values to remove
+        :param trail: (list) the undo log of domain changes
+        :param placed: (list) receives the cell if it becomes single
+            valued
+        :return: False if the domain became empty, True otherwise
+        """
+        domain = self.domains[cell]
+        if not domain & values:
+            return True
+        self.propagations += 1
+        trail.append((cell, domain))
+        domain &= ~values
+        self.domains[cell] = domain
+        if not domain:
+            self._dead_end(cell)
+            return False
+        if domain & (domain - 1) == 0:
+            placed.append(cell)
+        return True
+
+    def _dead_end(self, cell):
+        """
+        Count a dead end against the units of a cell left without values.
+        :param cell: (int) the cell
+        :return: None
+        """
+        for unit in self.topology.cell_units[cell]:
+            self.weights[unit] += 1
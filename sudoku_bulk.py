@@ -0,0 +1,196 @@
+# ----------------------------------------------------------------------
+# Name:     sudoku_bulk
+# Purpose:  Solve files of puzzles in bulk across a pool of processes
+# ----------------------------------------------------------------------
+"""
+Bulk sudoku solver.
+
+The input file holds one puzzle per line, row after row, with '.' or
+'0' for the empty squares (81 characters for 9x9 boards, 256 for
+16x16 and 625 for 25x25, where the values past 9 are written A, B, ...).
+The file is read lazily in chunks, and only a few chunks are in the
+worker processes at any time, so memory stays the same whatever the
+size of the input.  The output file gets one tab separated line per
+puzzle, in input order:
+    line number, solution (or -), seconds, assignments (or -), status
+Usage:  sudoku_bulk.py input output [--solver S] [--workers N]
+                       [--chunk-size N]
+solver: q1, q2, q3 (bitset backend), q4 or q5 (default q5)
+Examples:
+sudoku_bulk.py puzzles.txt solutions.tsv
+sudoku_bulk.py puzzles.txt solutions.tsv --solver q4 --workers 8
+"""
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import os
+import string
+import time
+import sudoku
+
+SOLVERS = ('q1', 'q2', 'q3', 'q4', 'q5')
+DIGITS = string.digits + string.ascii_uppercase  # value -> character
+
+
+def read_chunks(lines, chunk_size):
+    """
+    Group the puzzle lines of a file into chunks, lazily.
+    :param lines: an iterable of lines, such as an open file
+    :param chunk_size: (int) number of puzzles per chunk
+    :return: yields lists of (line number, line) tuples, skipping blank
+        lines and lines starting with #
+    """
+    numbered = ((number, line.strip())
+                for number, line in enumerate(lines, 1))
+    puzzles = ((number, line) for number, line in numbered
+               if line and not line.startswith('#'))
+    while True:
+        chunk = list(itertools.islice(puzzles, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_puzzle(line):
+    """
+    :param line: (string) a puzzle written row after row
+    :return: a tuple with the puzzle (dictionary) with (row, column)
+        keys and the block size n of the board
+    """
+    n = round(len(line) ** 0.25)
+    size = n * n
+    if size * size != len(line):
+        raise ValueError('not a square board: {} squares'.format(len(line)))
+    puzzle = {}
+    for cell, character in enumerate(line):
+        if character not in '.0':
+            value = int(character, 36)
+            if not 1 <= value <= size:
+                raise ValueError('bad value: {}'.format(character))
+            puzzle[divmod(cell, size)] = value
+    return puzzle, n
+
+
+def format_solution(solution, n):
+    """
+    :param solution: (dictionary) the solved board, (row, column) keys
+    :param n: (int) the block size of the board
+    :return: (string) the board written row after row
+    """
+    size = n * n
+    return ''.join(DIGITS[solution[(row, column)]]
+                   for row in range(size) for column in range(size))
+
+
+def solve_chunk(chunk, solver):
+    """
+    Worker process: solve one chunk of puzzles.
+    :param chunk: (list) of (line number, line) tuples
+    :param solver: (string) name of the sudoku function to use
+    :return: list of (line number, solution or None, seconds,
+        assignments or None, status) tuples
+    """
+    solve = getattr(sudoku, solver)
+    results = []
+    for number, line in chunk:
+        started = time.perf_counter()
+        solution = assignments = None
+        try:
+            puzzle, n = parse_puzzle(line)
+            if solver in ('q1', 'q2', 'q3'):
+                answer, solved_by = solve(puzzle, "bitset", n)
+            else:
+                answer, solved_by = solve(puzzle, n=n)
+            assignments = getattr(solved_by, 'assignments', None)
+            if answer is None:
+                status = 'unsolvable'
+            else:
+                solution = format_solution(answer, n)
+                status = 'solved'
+        except ValueError as error:
+            status = 'invalid: {}'.format(error)
+        except Exception as error:
+            status = 'error: {!r}'.format(error)
+        results.append((number, solution, time.perf_counter() - started,
+                        assignments, status))
+    return results
+
+
+def solve_file(input_path, output_path, solver='q5', workers=None,
+               chunk_size=1000):
+    """
+    Solve every puzzle of a file and write the results in input order.
+    :param input_path: (string) the file of puzzles, one per line
+    :param output_path: (string) the tab separated results file
+    :param solver: (string) 'q1', 'q2', 'q3', 'q4' or 'q5'
+    :param workers: (int) optional, number of worker processes
+    :param chunk_size: (int) number of puzzles sent to a worker at once
+    :return: a Counter of the statuses
+    """
+    if solver not in SOLVERS:
+        raise ValueError('unknown solver: {}'.format(solver))
+    workers = workers or os.cpu_count() or 1
+    statuses = collections.Counter()
+    with open(input_path) as puzzles, open(output_path, 'w') as output, \
+            concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        pending = collections.deque()  # futures, in input order
+        for chunk in read_chunks(puzzles, chunk_size):
+            pending.append(pool.submit(solve_chunk, chunk, solver))
+            if len(pending) >= 2 * workers:  # keep a bounded window
+                _write(pending.popleft().result(), output, statuses)
+        while pending:
+            _write(pending.popleft().result(), output, statuses)
+    return statuses
+
+
+def _write(results, output, statuses):
+    """
+    Write the results of one chunk.
+    :param results: (list) the tuples returned by solve_chunk
+    :param output: the open output file
+    :param statuses: (Counter) status -> number of puzzles, updated
+    :return: None
+    """
+    for number, solution, seconds, assignments, status in results:
+        output.write('{}\t{}\t{:.6f}\t{}\t{}\n'.format(
+            number, solution or '-', seconds,
+            '-' if assignments is None else assignments, status))
+        statuses[status.split(':')[0]] += 1
+
+
+def get_arguments():
+    """
+    Parse and validate the command line arguments
+    :return: the parsed arguments
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input',
+                        help='file of puzzles, one per line')
+    parser.add_argument('output',
+                        help='tab separated results file')
+    parser.add_argument('--solver',
+                        help='q1, q2, q3, q4 or q5?',
+                        choices=SOLVERS,
+                        default='q5')
+    parser.add_argument('--workers',
+                        help='number of worker processes',
+                        type=int,
+                        default=None)
+    parser.add_argument('--chunk-size',
+                        help='puzzles sent to a worker at once',
+                        type=int,
+                        default=1000)
+    return parser.parse_args()
+
+
+def main():
+    arguments = get_arguments()
+    statuses = solve_file(arguments.input, arguments.output,
+                          arguments.solver, arguments.workers,
+                          arguments.chunk_size)
+    for status, count in sorted(statuses.items()):
+        print(f'{status}: {count:,}')
+
+if __name__ == '__main__':
+    main()
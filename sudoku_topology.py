@@ -0,0 +1,115 @@
+# ----------------------------------------------------------------------
+# Name:     sudoku_topology
+# Purpose:  Units, peers and arcs of a sudoku board, computed once per
+#           board geometry and shared by every puzzle
+# ----------------------------------------------------------------------
+import functools
+import types
+
+
+class Topology(object):
+    """
+    The constraint graph of an n^2 x n^2 sudoku board (n = 3 for the
+    usual 9x9 board).  Everything is stored in tuples, frozensets and a
+    read-only mapping, so one Topology can be shared by any number of
+    puzzles and threads.  Pickling a Topology only sends
+    n, and the receiving process uses its own shared copy.
+    Cells are named by (row, column) tuples for csp.CSP and numbered
+    row * size + column for the index based solvers.
+
+    Arguments:
+    n (int) the size of a block, the board has n^2 rows and columns
+
+    Attributes:
+    n (int) the size of a block
+    size (int) number of rows (and columns and values), n^2
+    variables (tuple) every cell as a (row, column) tuple
+    units (tuple) the rows, columns and blocks as tuples of cells
+    neighbors (MappingProxyType) read-only mapping of cell -> frozenset
+        of its peers
+    arcs (tuple) every (cell, peer) pair
+    unit_indexes (tuple) the units as tuples of cell numbers
+    cell_units (tuple) cell number -> numbers of its row, column and
+        block units
+    peer_indexes (tuple) cell number -> tuple of its peers' numbers
+    arc_indexes (tuple) every (cell number, peer number) pair
+    segment_indexes (tuple) the n cells a row or a column shares with
+        a block, as tuples of cell numbers: the row segments first, row
+        by row, then the column segments, column by column
+    segment_peers (tuple) segment number -> (numbers of the other
+        segments on its row or column, numbers of the other segments of
+        its block in the same direction)
+    """
+
+    def __init__(self, n=3):
+        size = n * n
+        self.n = n
+        self.size = size
+        # rows, then columns, then blocks, built by index arithmetic
+        rows = [tuple(row * size + column for column in range(size))
+                for row in range(size)]
+        columns = [tuple(row * size + column for row in range(size))
+                   for column in range(size)]
+        blocks = [tuple((top + row) * size + left + column
+                        for row in range(n) for column in range(n))
+                  for top in range(0, size, n) for left in range(0, size, n)]
+        self.unit_indexes = tuple(rows + columns + blocks)
+        self.cell_units = tuple(
+            (row, size + column, 2 * size + row // n * n + column // n)
+            for row in range(size) for column in range(size))
+        self.peer_indexes = tuple(
+            tuple(sorted({peer for unit in units
+                          for peer in self.unit_indexes[unit]} - {cell}))
+            for cell, units in enumerate(self.cell_units))
+        self.arc_indexes = tuple((cell, peer)
+                                 for cell, peers in enumerate(self.peer_indexes)
+                                 for peer in peers)
+        # segment r * n + k is row r within block column k, segment
+        # size * n + c * n + k is column c within block row k
+        self.segment_indexes = tuple(
+            [tuple(row * size + k * n + j for j in range(n))
+             for row in range(size) for k in range(n)] +
+            [tuple((k * n + j) * size + column for j in range(n))
+             for column in range(size) for k in range(n)])
+        self.segment_peers = tuple(
+            (tuple(base + line * n + other for other in range(n)
+                   if other != k),
+             tuple(base + (line // n * n + other) * n + k
+                   for other in range(n) if other != line % n))
+            for base in (0, size * n)
+            for line in range(size) for k in range(n))
+        self.variables = tuple(divmod(cell, size)
+                               for cell in range(size * size))
+        cells = self.variables
+        self.units = tuple(tuple(cells[cell] for cell in unit)
+                           for unit in self.unit_indexes)
+        self.neighbors = types.MappingProxyType(
+            {cells[cell]: frozenset(cells[peer] for peer in peers)
+             for cell, peers in enumerate(self.peer_indexes)})
+        self.arcs = tuple((cells[cell], cells[peer])
+                          for cell, peer in self.arc_indexes)
+
+    def constraint(self, var1, val1, var2, val2):
+        """
+        The binary constraint of the sudoku CSP, see
+        sudoku.get_constrains.
+        :return: False if var1 and var2 are peers holding the same value,
+            True otherwise
+        """
+        return val1 != val2 or var1 not in self.neighbors[var2]
+
+    def __reduce__(self):
+        return get_topology, (self.n,)
+
+
+def get_topology(n=3):
+    """
+    :param n: (int) the size of a block, 3 for a 9x9 board
+    :return: the shared Topology for that board geometry
+    """
+    return _shared_topology(n)
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_topology(n):
+    return Topology(n)
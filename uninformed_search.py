@@ -3,59 +3,284 @@
 # Purpose:  Implement bread first search(BFS) and UCS graph search algorithms
 # ----------------------------------------------------------------------
 import data_structures # a private proprietary dependent class
+import math
+import bucket_queue
+import search_stats
 
-def bfs(problem):
+def bfs(problem, stats=None):
     """
     Breadth first graph search algorithm
     returns a solution for the given search problem
     :param
     problem (a Problem object) representing the quest
             see Problem class definition in spartanquest.py)
+    stats (a SearchStats or dictionary) optional, receives the search
+            counters, see search_stats.py
+    :return: list of actions representing the solution to the quest
+            or None if there is no solution
+    """
+    return complete(bfs_steps(problem, stats))
+
+
+def bfs_steps(problem, stats=None):
+    """
+    Breadth first graph search, one expansion at a time: a generator
+    that yields every node right after expanding it, and returns the
+    solution when it is exhausted (see complete).  bfs runs it to the
+    end; search_driver.SearchDriver runs it under budgets.
+    :param
+    problem (a Problem object) representing the quest
+            see Problem class definition in spartanquest.py)
+    stats (a SearchStats or dictionary) optional, receives the search
+            counters, see search_stats.py
     :return: list of actions representing the solution to the quest
             or None if there is no solution
     """
     closed = set()  # keep track of our explored states
     fringe = data_structures.Queue() # for dfs, the fringe is a queue
+    expand = problem.expand
+    if stats is not None:
+        fringe, expand, _ = search_stats.instrument(stats, fringe, expand)
     state = problem.start_state()
     root = data_structures.Node(state)
     fringe.push(root)
-    while True:
-        if fringe.empty():
-            return None  # Failure -  no solution was found
+    duplicates = 0
+    solution = None  # Failure -  unless a solution is found
+    while not fringe.empty():
         node = fringe.pop()
         if problem.is_goal(node.state):
-            return node.actions()
+            solution = node.actions()
+            break
         if node.state not in closed:  # we are implementing graph search
             closed.add(node.state)
-            for child_state, action, action_cost in problem.expand(node.state):
+            for child_state, action, action_cost in expand(node.state):
                 child_node = data_structures.Node(child_state, node, action)
                 fringe.push(child_node)
+            yield node
+        else:
+            duplicates += 1
+    if stats is not None:
+        search_stats.finish(stats, len(closed), duplicates)
+    return solution
 
 
-def ucs(problem):
+def ucs(problem, stats=None):
     """
     Uniform cost first graph search algorithm
     returns a solution for the given search problem
+    A child is only pushed when it improves on the best known cost to
+    its state, and fringe entries that have since been beaten are thrown
+    away when popped.  When every action cost is an integer the fringe
+    is a bucket queue instead of a heap.
+    :param
+    problem (a Problem object) representing the quest
+            see Problem class definition in spartanquest.py)
+    stats (a SearchStats or dictionary) optional, receives the search
+            counters (see search_stats.py) and the number of pushes
+            avoided under the key 'pushes_avoided'
+    :return: list of actions representing the solution to the quest
+    """
+    return complete(ucs_steps(problem, stats))
+
+
+def ucs_steps(problem, stats=None):
+    """
+    Uniform cost graph search, one expansion at a time: a generator
+    that yields every node right after expanding it, and returns the
+    solution when it is exhausted, see bfs_steps.
     :param
     problem (a Problem object) representing the quest
             see Problem class definition in spartanquest.py)
+    stats (a SearchStats or dictionary) optional, receives the search
+            counters, see ucs
     :return: list of actions representing the solution to the quest
     """
     closed = set()  # keep track of our explored states
-    fringe = data_structures.PriorityQueue() # for ucs, the fringe is a priorityQueue
+    best_cost = {}  # cheapest known cost to reach each state
+    fringe = bucket_queue.make_fringe(problem) # for ucs, the fringe is a priorityQueue
+    expand = problem.expand
+    if stats is not None:
+        fringe, expand, _ = search_stats.instrument(stats, fringe, expand)
     state = problem.start_state()
     root = data_structures.Node(state)
+    best_cost[state] = root.cumulative_cost
     fringe.push(root, root.cumulative_cost)
-    while True:
-        if fringe.empty():
-            return None  # Failure -  no solution was found
+    avoided = 0
+    stale = 0
+    solution = None  # Failure -  unless a solution is found
+    while not fringe.empty():
         node = fringe.pop()
+        if node.cumulative_cost > best_cost[node.state]:
+            stale += 1
+            continue  # stale entry, a cheaper path was pushed later
         if problem.is_goal(node.state):
-            return node.actions()
+            solution = node.actions()
+            break
         if node.state not in closed:  # we are implementing graph search
             closed.add(node.state)
-            for child_state, action, action_cost in problem.expand(node.state):
+            for child_state, action, action_cost in expand(node.state):
+                cost = node.cumulative_cost + action_cost
+                if (child_state in closed or
+                        cost >= best_cost.get(child_state, math.inf)):
+                    avoided += 1
+                    continue
+                best_cost[child_state] = cost
                 child_node = data_structures.Node(child_state, node, action)
-                child_node.cumulative_cost = node.cumulative_cost + action_cost
+                child_node.cumulative_cost = cost
                 fringe.push(child_node,child_node.cumulative_cost)
+            yield node
+    if stats is not None:
+        search_stats.finish(stats, len(closed), avoided + stale)
+        stats['pushes_avoided'] = avoided
+    return solution
+
+
+def complete(steps):
+    """
+    Run a search generator such as bfs_steps to the end.
+    :param steps: (a generator) the search, yielding after every
+        expansion and returning the solution
+    :return: the solution returned by the generator
+    """
+    while True:
+        try:
+            next(steps)
+        except StopIteration as finished:
+            return finished.value
+
+
+def bidirectional_bfs(problem):
+    """
+    Bidirectional breadth first graph search algorithm
+    Searches forward from the start state and backward from the goal
+    states at the same time, one whole layer at a time, and splices the
+    two Node chains together where the frontiers meet.
+    The problem must provide goal_states() and reverse_expand(state),
+    which returns (parent_state, action, action_cost) tuples such that
+    taking action in parent_state leads to state.  Problems that can't
+    enumerate predecessors fall back to the regular bfs.
+    :param
+    problem (a Problem object) representing the quest
+            see Problem class definition in spartanquest.py)
+    :return: list of actions representing the solution to the quest
+            or None if there is no solution
+    """
+    if not (hasattr(problem, 'goal_states') and
+            hasattr(problem, 'reverse_expand')):
+        return bfs(problem)
+    state = problem.start_state()
+    root = data_structures.Node(state)
+    if problem.is_goal(state):
+        return root.actions()
+    forward = {state: root}  # reached states -> Node, per direction
+    backward = {}
+    for goal in problem.goal_states():
+        backward[goal] = data_structures.Node(goal)
+    if not backward:
+        return None
+    forward_layer = [root]
+    backward_layer = list(backward.values())
+    while forward_layer and backward_layer:
+        # always grow the smaller frontier
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meet = _expand_layer(
+                forward_layer, forward, backward, problem.expand)
+            if meet:
+                return _splice(*meet)
+        else:
+            backward_layer, meet = _expand_layer(
+                backward_layer, backward, forward, problem.reverse_expand)
+            if meet:
+                forward_node, backward_node = meet
+                return _splice(backward_node, forward_node)
+    return None  # Failure -  the two searches never met
+
+
+def _expand_layer(layer, reached, other, expand):
+    """
+    Expand one whole breadth first layer of a bidirectional search.
+    :param layer: (list) the Nodes of the current frontier
+    :param reached: (dict) states reached in this direction -> Node
+    :param other: (dict) states reached in the opposite direction -> Node
+    :param expand: the successor (or predecessor) function to use
+    :return: a tuple with the next layer and the (this side, other side)
+        Node pair for the shortest meeting found, or None
+    """
+    next_layer = []
+    meet = None
+    for node in layer:
+        for child_state, action, action_cost in expand(node.state):
+            if child_state in reached:
+                continue
+            child_node = data_structures.Node(child_state, node, action)
+            reached[child_state] = child_node
+            next_layer.append(child_node)
+            if child_state in other:
+                length = (len(child_node.actions()) +
+                          len(other[child_state].actions()))
+                if meet is None or length < meet[0]:
+                    meet = (length, child_node, other[child_state])
+    if meet:
+        return next_layer, meet[1:]
+    return next_layer, None
+
+
+def _splice(forward_node, backward_node):
+    """
+    Join a forward Node chain and a backward Node chain that end in the
+    same state into a single list of actions.
+    :param forward_node: (Node) reached from the start state
+    :param backward_node: (Node) reached backward from a goal state
+    :return: list of actions from the start state to the goal state
+    """
+    # the backward chain lists its actions from the goal toward the meeting
+    # state, so they are replayed in reverse order
+    return forward_node.actions() + backward_node.actions()[::-1]
+
+
+def lean_bfs(problem):
+    """
+    Memory lean breadth first graph search algorithm
+    States are marked as seen when they are pushed, so each state enters
+    the fringe at most once, and the goal test is done when a child is
+    generated, which saves expanding one extra layer.  Instead of a Node
+    per edge, a single parent table keyed by state records how every
+    state was first reached.
+    :param
+    problem (a Problem object) representing the quest
+            see Problem class definition in spartanquest.py)
+    :return: list of actions representing the solution to the quest
+            or None if there is no solution
+    """
+    state = problem.start_state()
+    if problem.is_goal(state):
+        return []
+    parents = {state: None}  # state -> (parent state, action)
+    fringe = data_structures.Queue()  # the fringe holds bare states
+    fringe.push(state)
+    while not fringe.empty():
+        state = fringe.pop()
+        for child_state, action, action_cost in problem.expand(state):
+            if child_state in parents:
+                continue
+            parents[child_state] = (state, action)
+            if problem.is_goal(child_state):
+                return _trace_actions(parents, child_state)
+            fringe.push(child_state)
+    return None  # Failure -  no solution was found
 
+
+def _trace_actions(parents, state):
+    """
+    Follow a parent table back from the given state to the start state.
+    :param parents: (dict) state -> (parent state, action), or None for
+        the start state
+    :param state: the state reached at the end of the solution
+    :return: list of actions leading from the start state to state
+    """
+    actions = []
+    while parents[state] is not None:
+        state, action = parents[state]
+        actions.append(action)
+    actions.reverse()
+    return actions